@@ -1,42 +1,306 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, url_for
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import is_resource_modified
+from contextlib import contextmanager
+from functools import wraps
 from models.analyzer import StudentAnalyzer
-import pandas as pd
+from models.batcher import MicroBatcher
+from models.executor import BoundedExecutor, ServerBusy
+from models.features import build_feature_table, merge_feature_tables
+from models.ingest import changed_rows, merge_rosters, read_roster, validate_header, validate_records
+from models.storage import RosterStore
+from models.jobs import TrainingJobs
+from models.metrics import REQUEST_SECONDS, SamplingProfiler, registry, stage
+import base64
+import config
+import json
+import os
+import time
 import traceback
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Records JSON serialization of responses as its own stage"""
+
+    def response(self, *args, **kwargs):
+        with stage('route.serialize'):
+            return super().response(*args, **kwargs)
 
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
 analyzer = StudentAnalyzer()
 analyzer.load_data()
+training_jobs = TrainingJobs(state_dir=config.JOB_STATE_DIR)
+# CPU-bound analyzer work runs here so request threads cannot oversubscribe the CPU
+analysis_pool = BoundedExecutor(config.ANALYSIS_WORKERS, config.ANALYSIS_MAX_PENDING)
+# Ad-hoc /predict records from concurrent requests are scored together in small batches
+prediction_batcher = MicroBatcher(analyzer.predict_records, config.PREDICT_BATCH_MAX,
+                                  config.PREDICT_BATCH_WAIT_SECONDS, config.PREDICT_MAX_PENDING)
+
+def read_data_marker():
+    try:
+        with open(config.DATA_MARKER_PATH) as f:
+            return f.read()
+    except OSError:
+        return None
+
+def write_data_marker(version_tag):
+    os.makedirs(os.path.dirname(config.DATA_MARKER_PATH) or '.', exist_ok=True)
+    tmp_path = f'{config.DATA_MARKER_PATH}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(version_tag)
+    os.replace(tmp_path, config.DATA_MARKER_PATH)
+    reload_state['marker'] = reload_state['loaded'] = version_tag
+
+@contextmanager
+def data_lock():
+    """
+    Serialize changes to the stored roster across server processes with an flock next to the data marker.
+    Without fcntl (Windows) the app runs as a single process, whose uploads already run one at a time.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(config.DATA_MARKER_PATH) or '.', exist_ok=True)
+    with open(f'{config.DATA_MARKER_PATH}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def collect_app_metrics():
+    """Dataset, cache and model gauges for /metrics, read from the current snapshot when scraped"""
+    snapshot = analyzer.snapshot
+    cache = analyzer.analysis_cache
+    lookups = cache.hits + cache.misses
+    predictor = snapshot.predictor
+    report = predictor.training_report or {}
+    return [
+        ('student_analytics_data_version', 'gauge', 'Version of the published data snapshot',
+         [({}, snapshot.version)]),
+        ('student_analytics_dataset_students', 'gauge', 'Students in the published roster',
+         [({}, 0 if snapshot.data is None else len(snapshot.data))]),
+        ('student_analytics_dataset_classes', 'gauge', 'Classes in the published roster',
+         [({}, len(snapshot.class_index))]),
+        ('student_analytics_analysis_cache_hits_total', 'counter', 'Analyses served from the cache',
+         [({}, cache.hits)]),
+        ('student_analytics_analysis_cache_misses_total', 'counter', 'Analyses computed on a cache miss',
+         [({}, cache.misses)]),
+        ('student_analytics_analysis_cache_hit_ratio', 'gauge', 'Share of analyses served from the cache',
+         [({}, cache.hits / lookups if lookups else 0.0)]),
+        ('student_analytics_analysis_cache_entries', 'gauge', 'Analyses currently cached',
+         [({}, len(cache))]),
+        ('student_analytics_model_trees', 'gauge', 'Trees in each subject forest',
+         [({'subject': subject}, len(model.estimators_)) for subject, model in predictor.models.items()]),
+        ('student_analytics_model_training_seconds', 'gauge', 'Per-subject fit time of the last training in this process',
+         [({'subject': subject}, seconds) for subject, seconds in report.get('subject_seconds', {}).items()]),
+    ]
+
+registry.register_collector(collect_app_metrics)
+
+# Last data marker this process saw, the marker of the data it has loaded, and when it last looked at the file
+reload_state = {'marker': read_data_marker(), 'checked_at': time.monotonic()}
+reload_state['loaded'] = reload_state['marker']
+
+def load_published_data(progress=None):
+    """Load the stored roster and its saved models; the caller holds data_lock() so they match the marker"""
+    marker = read_data_marker()
+    if not analyzer.load_data(progress=progress):
+        raise ValueError("Could not reload data")
+    reload_state['loaded'] = marker
+
+def reload_data(progress=None):
+    """Reload data and models another server process published"""
+    with data_lock():
+        load_published_data(progress)
+    return {'data_version': analyzer.data_version}
+
+@app.before_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    if config.PROFILING_ENABLED and request.args.get('profile') == '1':
+        g.profiler = SamplingProfiler(config.PROFILE_INTERVAL_SECONDS).start()
+
+@app.after_request
+def record_request_metrics(response):
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, request.endpoint or 'unmatched',
+                            request.method, str(response.status_code))
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        # Replace the response with the folded stacks sampled while it was produced
+        profiler.stop()
+        profile = Response(profiler.folded(), content_type='text/plain; charset=utf-8')
+        profile.headers['X-Profiled-Status'] = str(response.status_code)
+        return profile
+    return response
+
+@app.teardown_request
+def stop_profiler(error=None):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+@app.before_request
+def reload_if_stale():
+    now = time.monotonic()
+    if now - reload_state['checked_at'] < config.RELOAD_CHECK_SECONDS:
+        return
+    reload_state['checked_at'] = now
+    marker = read_data_marker()
+    if marker != reload_state['marker']:
+        reload_state['marker'] = marker
+        training_jobs.submit(reload_data)
+
+def busy_response(error):
+    response = jsonify({'success': False, 'error': str(error)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def run_analysis(fn, *args, **kwargs):
+    """Run an analyzer call on the bounded pool; a profiled request's sampler follows it there"""
+    profiler = g.get('profiler')
+    if profiler is not None:
+        fn = profiler.follow(fn)
+    return analysis_pool.run(fn, *args, **kwargs)
+
+def conditional(view):
+    """
+    Serve a view with validators of the data snapshot it reads, answering 304 while they still match.
+    The ETag comes from the saved model artifact, so every worker serving the same upload agrees on it.
+    The snapshot is pinned in g.snapshot so the body and its validators describe the same data version.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        snapshot = g.snapshot = analyzer.snapshot
+        if not is_resource_modified(request.environ, etag=snapshot.etag, last_modified=snapshot.last_modified):
+            response = Response(status=304)
+        else:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(snapshot.etag)
+        response.last_modified = snapshot.last_modified
+        # Clients may keep the response but must revalidate, since an upload can change it at any time
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
+class StaleCursor(Exception):
+    """A page cursor issued for a data version that has since been replaced"""
+
+def encode_cursor(snapshot, position):
+    if position is None:
+        return None
+    raw = json.dumps([snapshot.etag, position]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(snapshot, cursor):
+    """Position a cursor continues after; cursors from another data version are rejected"""
+    if not cursor:
+        return -1
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        etag, position = json.loads(raw)
+        position = int(position)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    # -1 is the start; anything lower would index from the end of the list
+    if position < -1:
+        raise ValueError("Invalid cursor")
+    if etag != snapshot.etag:
+        raise StaleCursor("Data changed since this cursor was issued, restart from the first page")
+    return position
+
+def page_limit():
+    limit = request.args.get('limit', str(config.LIST_PAGE_SIZE))
+    if not limit.isdigit() or not 1 <= int(limit) <= config.LIST_MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {config.LIST_MAX_PAGE_SIZE}")
+    return int(limit)
 
 @app.route('/')
 def home():
     try:
+        # Students are fetched page by page from /students, so the page itself stays small
         classes = analyzer.get_class_list()
-        students = analyzer.data[['student_id', 'student_name', 'class']].to_dict('records')
-        return render_template('dashboard.html', classes=classes, students=students)
+        return render_template('dashboard.html', classes=classes)
     except Exception as e:
         return f"Error loading dashboard: {str(e)}", 500
 
+@app.route('/students')
+@conditional
+def list_students():
+    try:
+        snapshot = g.snapshot
+        limit = page_limit()
+        after = decode_cursor(snapshot, request.args.get('cursor'))
+        students, next_after = analyzer.list_students(
+            class_id=request.args.get('class') or None, risk=request.args.get('risk') or None,
+            after=after, limit=limit, snapshot=snapshot
+        )
+        return jsonify({
+            'success': True,
+            'students': students,
+            'next_cursor': encode_cursor(snapshot, next_after)
+        })
+    except StaleCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error listing students: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/classes')
+@conditional
+def list_classes():
+    try:
+        snapshot = g.snapshot
+        limit = page_limit()
+        after = decode_cursor(snapshot, request.args.get('cursor'))
+        classes, next_after = analyzer.list_classes(after=after, limit=limit, snapshot=snapshot)
+        return jsonify({
+            'success': True,
+            'classes': classes,
+            'next_cursor': encode_cursor(snapshot, next_after)
+        })
+    except StaleCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error listing classes: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/student/<student_id>')
+@conditional
 def student_analysis(student_id):
     try:
         if not student_id:
             return jsonify({'success': False, 'error': 'Student ID is required'}), 400
 
-        # Get student performance data
-        performance = analyzer.get_student_performance(student_id)
-        
-        # Get analysis of weak and strong subjects
-        analysis = analyzer.identify_weak_subjects(student_id)
-        
-        # Get personalized recommendations
-        suggestions = analyzer.get_recommendations(student_id)
+        # Performance, weak/strong subjects and recommendations from a single analysis pass
+        result = run_analysis(analyzer.analyze_student, student_id, snapshot=g.snapshot)
         
         return jsonify({
             'success': True,
-            'performance': performance,
-            'analysis': analysis,
-            'suggestions': suggestions
+            'performance': result['performance'],
+            'analysis': result['analysis'],
+            'suggestions': result['suggestions']
         })
+    except ServerBusy as e:
+        return busy_response(e)
     except Exception as e:
         app.logger.error(f"Error in student analysis: {str(e)}\n{traceback.format_exc()}")
         return jsonify({
@@ -45,16 +309,19 @@ def student_analysis(student_id):
         }), 500
 
 @app.route('/class/<class_id>')
+@conditional
 def class_analysis(class_id):
     try:
         if not class_id:
             return jsonify({'success': False, 'error': 'Class ID is required'}), 400
 
-        insights = analyzer.get_class_insights(class_id)
+        insights = run_analysis(analyzer.get_class_insights, class_id, snapshot=g.snapshot)
         return jsonify({
             'success': True,
             'insights': insights
         })
+    except ServerBusy as e:
+        return busy_response(e)
     except Exception as e:
         app.logger.error(f"Error in class analysis: {str(e)}")
         return jsonify({
@@ -62,6 +329,116 @@ def class_analysis(class_id):
             'error': str(e)
         }), 500
 
+@app.route('/classes/insights')
+@conditional
+def all_class_analysis():
+    try:
+        insights = run_analysis(analyzer.get_all_class_insights, snapshot=g.snapshot)
+        return jsonify({
+            'success': True,
+            'insights': insights
+        })
+    except ServerBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        app.logger.error(f"Error in class overview: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/class/<class_id>/predictions')
+@conditional
+def class_predictions(class_id):
+    try:
+        predictions = run_analysis(analyzer.predict_final_marks_batch, class_id=class_id, snapshot=g.snapshot)
+        return jsonify({
+            'success': True,
+            'predictions': predictions
+        })
+    except ServerBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        app.logger.error(f"Error in class predictions: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        payload = request.get_json(silent=True) or {}
+        if not isinstance(payload, dict):
+            return jsonify({'success': False, 'error': 'request body must be a JSON object'}), 400
+        student_ids = payload.get('student_ids')
+        class_id = payload.get('class')
+        if student_ids is None and class_id is None:
+            return jsonify({'success': False, 'error': 'student_ids or class is required'}), 400
+        if student_ids is not None and (not isinstance(student_ids, list)
+                                        or not all(isinstance(sid, str) for sid in student_ids)):
+            return jsonify({'success': False, 'error': 'student_ids must be a list of strings'}), 400
+        if class_id is not None and not isinstance(class_id, str):
+            return jsonify({'success': False, 'error': 'class must be a string'}), 400
+
+        predictions = run_analysis(analyzer.predict_final_marks_batch, student_ids=student_ids, class_id=class_id)
+        missing = [sid for sid in (student_ids or []) if sid not in predictions]
+        return jsonify({
+            'success': True,
+            'predictions': predictions,
+            'missing': missing
+        })
+    except ServerBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        app.logger.error(f"Error in batch prediction: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/what-if')
+def what_if():
+    return render_template('index.html')
+
+@app.route('/predict', methods=['POST'])
+def predict_records():
+    try:
+        # A single record object, a list of records, or {"records": [...]}
+        payload = request.get_json(silent=True)
+        single = isinstance(payload, dict) and 'records' not in payload
+        if single:
+            records = [payload]
+        elif isinstance(payload, dict):
+            records = payload['records']
+        else:
+            records = payload
+        if not isinstance(records, list) or not records:
+            return jsonify({'success': False, 'error': 'Expected a record, a list of records or {"records": [...]}'}), 400
+        if len(records) > config.PREDICT_MAX_RECORDS:
+            return jsonify({'success': False, 'error': f'At most {config.PREDICT_MAX_RECORDS} records per request'}), 400
+        try:
+            records = validate_records(records, analyzer.predictor.subjects)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        results = prediction_batcher.submit(records)
+        if single:
+            return jsonify({'success': True, **results[0]})
+        return jsonify({'success': True, 'results': results})
+    except ServerBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        app.logger.error(f"Error in prediction: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/metrics')
+def metrics():
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/upload', methods=['POST'])
 def upload_data():
     try:
@@ -69,12 +446,70 @@ def upload_data():
         if not file:
             return jsonify({'success': False, 'error': 'No file provided'}), 400
 
-        df = pd.read_csv(file)
-        df.to_csv('data/detailed_student_data.csv', index=False)
-        analyzer.load_data()  # Reload the data
-        return jsonify({'success': True, 'message': 'Data uploaded successfully'})
+        mode = request.form.get('mode', 'append')
+        if mode not in ('append', 'replace'):
+            return jsonify({'success': False, 'error': "mode must be 'append' or 'replace'"}), 400
+
+        # Stream the upload to disk unparsed; only its header is checked in the request
+        os.makedirs(config.UPLOAD_DIR, exist_ok=True)
+        staged_path = os.path.join(config.UPLOAD_DIR, f'{uuid.uuid4().hex}.csv')
+        file.save(staged_path)
+        try:
+            validate_header(staged_path, analyzer.subjects)
+        except ValueError as e:
+            os.remove(staged_path)
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        # Parse and retrain in the background; requests keep using the current snapshot until it is published
+        job_id = training_jobs.submit(apply_upload, staged_path, mode)
+        return jsonify({
+            'success': True,
+            'message': 'Data uploaded, retraining in background',
+            'job_id': job_id,
+            'status_url': url_for('upload_status', job_id=job_id)
+        }), 202
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/upload/status/<job_id>')
+def upload_status(job_id):
+    job = training_jobs.status(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify({'success': True, 'job': job})
+
+def apply_upload(staged_path, mode='append', progress=None):
+    """
+    Parse a staged upload once, merge it into the roster, train and publish,
+    then store the merged roster as the dataset (in its columnar copy when enabled)
+    """
+    try:
+        uploaded = read_roster(staged_path, analyzer.subjects)
+        # Derived features are computed for the uploaded rows only and reused for everyone else
+        uploaded_features = build_feature_table(uploaded, analyzer.subjects)
+        # One upload at a time across all server processes, from reading the roster to writing the marker
+        with data_lock():
+            if mode == 'append':
+                if read_data_marker() != reload_state['loaded']:
+                    # Another process published since this one loaded: merge into its roster, not a stale one
+                    load_published_data()
+                current = analyzer.snapshot
+                delta = changed_rows(current.data, uploaded, analyzer.subjects)
+                data = merge_rosters(current.data, uploaded)
+                features = merge_feature_tables(current.data, current.features, uploaded, uploaded_features)
+                if len(delta) <= config.INCREMENTAL_MAX_FRACTION * len(data):
+                    snapshot = analyzer.update_frame(data, delta, progress=progress, features=features)
+                else:
+                    snapshot = analyzer.load_frame(data, progress=progress, features=features)
+            else:
+                data = uploaded
+                snapshot = analyzer.load_frame(data, progress=progress, features=uploaded_features)
+            RosterStore(config.DATA_PATH, config.STORAGE_FORMAT, analyzer.subjects).write(data)
+            # Tell the other server processes to pick up the stored data and its saved models
+            write_data_marker(f'{uuid.uuid4().hex} {snapshot.version}')
+    finally:
+        os.remove(staged_path)
+    return {'data_version': snapshot.version, 'uploaded_rows': len(uploaded), 'total_rows': len(data)}
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,69 @@
+"""
+Compare two benchmark suite result files and flag timings that got slower.
+
+Usage: python -m benchmarks.compare BASE.json NEW.json [--threshold 0.20] [--min-seconds 0.001]
+Exits with status 1 when any timing regressed by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+# Latency statistics compared for request timings; n and the tail percentiles are reported by the suite only
+COMPARED_STATS = ('p50', 'mean')
+
+
+def flatten(report):
+    """{(students, metric): seconds} for every timing in a suite result"""
+    timings = {}
+    for result in report['results']:
+        for name, value in result['timings'].items():
+            if isinstance(value, dict):
+                for stat in COMPARED_STATS:
+                    timings[(result['students'], f'{name}.{stat}')] = value[stat]
+            else:
+                timings[(result['students'], name)] = value
+    return timings
+
+
+def label(report):
+    commit = (report.get('commit') or 'unknown')[:10]
+    return f"{commit}{'-dirty' if report.get('dirty') else ''}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base', help='baseline result file')
+    parser.add_argument('new', help='result file to check')
+    parser.add_argument('--threshold', type=float, default=0.20, help='relative slowdown reported as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.001,
+                        help='ignore timings faster than this in both runs, where noise dominates')
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base_report = json.load(f)
+    with open(args.new) as f:
+        new_report = json.load(f)
+    base, new = flatten(base_report), flatten(new_report)
+
+    print(f"{label(base_report)} -> {label(new_report)}")
+    print(f"{'students':>9} {'metric':<36} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    regressions = 0
+    for key in sorted(base.keys() & new.keys()):
+        students, metric = key
+        before, after = base[key], new[key]
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if max(before, after) >= args.min_seconds and change > args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f'{students:>9} {metric:<36} {before * 1000:>10.2f} {after * 1000:>10.2f} {change:>+8.1%}{flag}')
+
+    missing = sorted(base.keys() - new.keys())
+    if missing:
+        print(f"Not in {args.new}: {', '.join(f'{students}/{metric}' for students, metric in missing)}")
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Benchmark prediction confidence: the original per-tree loop vs the packed forest walk, end-to-end
+predict_batch latency per confidence method, and how well each method agrees with the original
+np.std of tree predictions.
+
+Usage: python -m benchmarks.confidence_benchmark [--train-rows 20000] [--batches 1,100,10000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_roster
+from models.confidence import METHODS, confidence_from_spread, tree_spread
+from models.predictor import StudentPredictor
+
+
+def legacy_confidence(model, X_scaled):
+    """The per-estimator loop predict() used before the packed forest"""
+    tree_predictions = []
+    for tree in model.estimators_:
+        tree_predictions.append(tree.predict(X_scaled))
+    return confidence_from_spread(np.std(tree_predictions, axis=0))
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train-rows', type=int, default=20000, help='synthetic roster size to train on')
+    parser.add_argument('--batches', default='1,100,10000', help='comma separated batch sizes to time')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    roster = generate_roster(args.train_rows, seed=7)
+    predictor = StudentPredictor()
+    predictor.train(data=roster)
+    subject = 'maths'
+    model = predictor.models[subject]
+
+    print('Latency per subject (ms)')
+    print(f"{'batch':>8} {'per-tree loop':>14} {'packed forest':>14}")
+    for size in [int(b) for b in args.batches.split(',')]:
+        batch = generate_roster(size, seed=8)
+        X, _ = predictor._build_features(batch, [subject])
+        X_scaled = predictor.scalers[subject].transform(X[subject])
+        legacy = best_of(args.repeat, lambda: legacy_confidence(model, X_scaled))
+        packed = best_of(args.repeat, lambda: predictor._packed_forest(subject).tree_predictions(X_scaled))
+        print(f'{size:>8} {legacy * 1000:>14.2f} {packed * 1000:>14.2f}')
+
+    print('\nEnd-to-end predict_batch, all subjects (ms)')
+    print(f"{'batch':>8}" + ''.join(f'{method:>12}' for method in METHODS))
+    for size in [int(b) for b in args.batches.split(',')]:
+        batch = generate_roster(size, seed=8)
+        row = f'{size:>8}'
+        for method in METHODS:
+            predictor.confidence_method = method
+            seconds = best_of(args.repeat, lambda: predictor.predict_batch(batch))
+            row += f'{seconds * 1000:>12.2f}'
+        print(row)
+
+    batch = generate_roster(5000, seed=9)
+    X, _ = predictor._build_features(batch, [subject])
+    X_scaled = predictor.scalers[subject].transform(X[subject])
+    reference = legacy_confidence(model, X_scaled)
+
+    print('\nAgreement with the original np.std confidence (5000 students)')
+    print(f"{'method':>12} {'mean |diff|':>12} {'max |diff|':>11} {'correlation':>12}")
+    tree_predictions = predictor._packed_forest(subject).tree_predictions(X_scaled)
+    for method in METHODS:
+        confidence = confidence_from_spread(tree_spread(tree_predictions, method))
+        diff = np.abs(confidence - reference)
+        correlation = np.corrcoef(confidence, reference)[0, 1] if confidence.std() and reference.std() else float('nan')
+        print(f'{method:>12} {diff.mean():>12.3f} {diff.max():>11.3f} {correlation:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Concurrent load test for a running server: reports p50/p99 latency for /student/<id> and /class/<id>.
+
+Usage: python -m benchmarks.load_test [--url http://127.0.0.1:8000] [--concurrency 16] [--requests 500]
+"""
+import argparse
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def fetch(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = None
+    return status, time.perf_counter() - start
+
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=120) as response:
+        return json.loads(response.read())
+
+
+def report(name, results, elapsed):
+    latencies = np.array([seconds for _, seconds in results]) * 1000
+    errors = sum(1 for status, _ in results if status != 200)
+    print(f"{name:<10} n={len(results):<6} rps={len(results) / elapsed:>8.1f} "
+          f"p50={np.percentile(latencies, 50):>8.1f}ms p99={np.percentile(latencies, 99):>8.1f}ms "
+          f"max={latencies.max():>8.1f}ms errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='server base URL')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Discover classes and their students through the batch endpoints
+    classes = list(get_json(f'{args.url}/classes/insights')['insights'])
+    students = []
+    for class_id in classes:
+        students.extend(get_json(f'{args.url}/class/{class_id}/predictions')['predictions'])
+
+    rng = random.Random(args.seed)
+    targets = {
+        'student': [f'{args.url}/student/{rng.choice(students)}' for _ in range(args.requests)],
+        'class': [f'{args.url}/class/{rng.choice(classes)}' for _ in range(args.requests)],
+    }
+
+    print(f"{len(students)} students in {len(classes)} classes, concurrency {args.concurrency}")
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for name, urls in targets.items():
+            start = time.perf_counter()
+            results = list(pool.map(fetch, urls))
+            report(name, results, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Microbenchmark student lookup: boolean-mask scan vs the StudentAnalyzer indexes.
+
+Usage: python -m benchmarks.lookup_benchmark [--sizes 10000,100000,1000000] [--lookups 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_roster
+from models.analyzer import StudentAnalyzer
+from models.predictor import StudentPredictor
+
+
+def time_per_call(fn, keys):
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma separated roster sizes')
+    parser.add_argument('--lookups', type=int, default=200, help='random lookups per size')
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'scan us':>10} {'index us':>10} {'index build s':>14}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        data = generate_roster(size, n_classes=max(4, size // 40))
+
+        # Publishing builds the student_id and class indexes; the models are not needed here
+        start = time.perf_counter()
+        snapshot = StudentAnalyzer().publish(data, StudentPredictor())
+        build = time.perf_counter() - start
+
+        rng = np.random.default_rng(0)
+        keys = data['student_id'].to_numpy()[rng.integers(0, size, args.lookups)]
+        scan = time_per_call(lambda sid: data[data['student_id'] == sid].iloc[0], keys)
+        indexed = time_per_call(snapshot.get_student, keys)
+
+        print(f'{size:>10} {scan:>10.1f} {indexed:>10.1f} {build:>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
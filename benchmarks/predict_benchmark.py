@@ -0,0 +1,65 @@
+"""
+Throughput of POST /predict under concurrent single-record requests, with and without micro-batching.
+
+Usage: python -m benchmarks.predict_benchmark [--clients 16] [--requests 50] [--wait 0.002]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from models.batcher import MicroBatcher
+
+
+def run(client_factory, clients, requests, payloads):
+    def worker(offset):
+        client = client_factory()
+        latencies = []
+        for i in range(requests):
+            start = time.perf_counter()
+            response = client.post('/predict', json=payloads[(offset + i) % len(payloads)])
+            if response.status_code != 200:
+                raise RuntimeError(f"/predict returned {response.status_code}: {response.get_json()}")
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = np.concatenate(list(pool.map(worker, range(clients))))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=50, help='requests per client')
+    parser.add_argument('--wait', type=float, default=0.002, help='batching window in seconds')
+    args = parser.parse_args()
+
+    import app as app_module
+    subjects = app_module.analyzer.predictor.subjects
+    rng = np.random.default_rng(0)
+    payloads = []
+    for _ in range(256):
+        record = {
+            f'{test}_{subject}_{term}': int(rng.integers(30, 100))
+            for subject in subjects for test in ('pat', 'sat') for term in ('t1', 't2')
+        }
+        record['attendance_percentage'] = int(rng.integers(60, 100))
+        payloads.append(record)
+
+    batchers = {
+        'unbatched': MicroBatcher(app_module.analyzer.predict_records, max_batch=1, max_wait=0),
+        'batched': MicroBatcher(app_module.analyzer.predict_records, max_batch=256, max_wait=args.wait),
+    }
+    print(f"{'mode':<10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, batcher in batchers.items():
+        app_module.prediction_batcher = batcher
+        throughput, p50, p99 = run(app_module.app.test_client, args.clients, args.requests, payloads)
+        print(f'{name:<10} {throughput:>8.1f} {p50:>8.1f} {p99:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare roster load times: CSV text vs the columnar formats in models/storage.py.
+
+Usage: python -m benchmarks.storage_benchmark [--sizes 100000,1000000] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_roster
+from models.storage import CsvStore, FeatherStore, ParquetStore
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100000,1000000', help='comma separated roster sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    subject_columns = ['pat_maths_t1', 'sat_maths_t1', 'pat_maths_t2', 'sat_maths_t2', 'attendance_percentage']
+    print(f"{'rows':>10} {'format':>8} {'size MB':>8} {'full s':>8} {'1 subject s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(s) for s in args.sizes.split(',')]:
+            csv_path = os.path.join(tmp, f'roster_{size}.csv')
+            write_roster(csv_path, size)
+            csv = CsvStore(csv_path)
+            data = csv.read()
+
+            stores = [('csv', csv)]
+            for name, store_cls in (('feather', FeatherStore), ('parquet', ParquetStore)):
+                store = store_cls(os.path.join(tmp, f'roster_{size}{store_cls.extension}'))
+                store.write(data)
+                stores.append((name, store))
+
+            # Plain pandas parse, as the app did before dtypes and columnar storage
+            raw = best_of(args.repeat, lambda: pd.read_csv(csv_path))
+            print(f"{size:>10} {'raw csv':>8} {os.path.getsize(csv_path) / 1e6:>8.1f} {raw:>8.3f} {'-':>12}")
+            for name, store in stores:
+                full = best_of(args.repeat, store.read)
+                subset = best_of(args.repeat, lambda: store.read(subject_columns))
+                megabytes = os.path.getsize(store.path) / 1e6
+                print(f'{size:>10} {name:>8} {megabytes:>8.1f} {full:>8.3f} {subset:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+End-to-end benchmark suite on synthetic rosters: roster read, training, model load, per-student analysis,
+class insights and an appended upload, each timed through the Flask app at every roster size.
+Results are written as JSON tagged with the git commit; compare two runs with benchmarks.compare.
+
+Usage: python -m benchmarks.suite [--sizes 1000,10000,100000] [--class-size 40] [--students 200]
+                                  [--upload-fraction 0.05] [--output results.json]
+"""
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.synthetic import generate_roster
+
+
+def git_revision():
+    """Current commit and whether tracked files have uncommitted changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def summarize(seconds):
+    """Latency statistics for a list of per-call durations in seconds"""
+    seconds = np.asarray(seconds)
+    return {
+        'n': int(len(seconds)),
+        'mean': float(seconds.mean()),
+        'p50': float(np.percentile(seconds, 50)),
+        'p95': float(np.percentile(seconds, 95)),
+        'p99': float(np.percentile(seconds, 99)),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def time_requests(client, urls):
+    durations = []
+    for url in urls:
+        response, seconds = timed(client.get, url)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+        durations.append(seconds)
+    return summarize(durations)
+
+
+def upload_roster(fraction, n_classes, size):
+    """An upload where half the rows change existing students and half add new ones"""
+    rows = max(2, int(size * fraction))
+    upload = generate_roster(rows, n_classes=n_classes, seed=size + 1)
+    new = rows // 2
+    upload.loc[rows - new:, 'student_id'] = [f'STU{i:07d}' for i in range(size + 1, size + 1 + new)]
+    return upload
+
+
+def run_size(app_module, client, root, size, args):
+    from models.predictor import StudentPredictor
+    from models.storage import RosterStore
+
+    n_classes = max(1, size // args.class_size)
+    data_path = os.path.join(root, f'roster-{size}.csv')
+    generate_roster(size, n_classes=n_classes, seed=42).to_csv(data_path, index=False)
+    timings = {}
+
+    config = app_module.config
+    config.DATA_PATH = data_path
+    subjects = app_module.analyzer.subjects
+    store = RosterStore(data_path, config.STORAGE_FORMAT, subjects)
+    # The first read parses the CSV and writes the columnar copy; later reads use the copy
+    data, timings['read_csv_seconds'] = timed(store.read)
+    _, timings['read_seconds'] = timed(store.read)
+
+    predictor = StudentPredictor()
+    _, timings['train_seconds'] = timed(predictor.train, data=data)
+    fingerprint = predictor.fingerprint(data)
+    _, timings['save_seconds'] = timed(predictor.save, predictor.artifact_path(config.MODEL_DIR, fingerprint), fingerprint)
+
+    # Startup path: read the stored roster, load its saved models, build features and indexes, publish
+    loaded, timings['load_seconds'] = timed(app_module.analyzer.load_data, data_path, config.MODEL_DIR)
+    if not loaded:
+        raise RuntimeError(f"Could not load {data_path}")
+
+    rng = np.random.default_rng(0)
+    student_urls = [f'/student/{sid}' for sid in rng.choice(data['student_id'].to_numpy(), args.students)]
+    classes = sorted(data['class'].unique())
+    sampled_classes = rng.choice(classes, min(len(classes), args.classes))
+    timings['student_request'] = time_requests(client, student_urls)
+    timings['student_request_cached'] = time_requests(client, student_urls)
+    timings['class_request'] = time_requests(client, [f'/class/{c}' for c in sampled_classes])
+    timings['class_predictions_request'] = time_requests(client, [f'/class/{c}/predictions' for c in sampled_classes])
+    timings['all_class_insights_request'] = time_requests(client, ['/classes/insights'] * 3)
+
+    # Upload end to end: request, background parse, incremental update or retrain, publish and store
+    upload_path = os.path.join(root, f'upload-{size}.csv')
+    upload_roster(args.upload_fraction, n_classes, size).to_csv(upload_path, index=False)
+    start = time.perf_counter()
+    with open(upload_path, 'rb') as f:
+        response = client.post('/upload', data={'file': (f, 'upload.csv'), 'mode': 'append'})
+    timings['upload_request_seconds'] = time.perf_counter() - start
+    if response.status_code != 202:
+        raise RuntimeError(f"Upload returned {response.status_code}: {response.get_json()}")
+    status_url = response.get_json()['status_url']
+    while True:
+        job = client.get(status_url).get_json()['job']
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.01)
+    timings['upload_total_seconds'] = time.perf_counter() - start
+    if job['status'] == 'failed':
+        raise RuntimeError(f"Upload job failed: {job.get('error')}")
+
+    return {'students': size, 'classes': n_classes, 'upload_rows': job['result']['uploaded_rows'], 'timings': timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma separated roster sizes')
+    parser.add_argument('--class-size', type=int, default=40, help='students per class')
+    parser.add_argument('--students', type=int, default=200, help='student requests timed per size')
+    parser.add_argument('--classes', type=int, default=20, help='classes whose requests are timed per size')
+    parser.add_argument('--upload-fraction', type=float, default=0.05, help='upload size as a fraction of the roster')
+    parser.add_argument('--output', help='result file (default benchmarks/results/<time>-<commit>.json)')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    commit, dirty = git_revision()
+    started = datetime.datetime.now(datetime.timezone.utc)
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        # config is read when the app and models are imported, so point it at scratch locations first
+        os.environ['STUDENT_DATA_PATH'] = os.path.join(root, 'empty.csv')
+        os.environ['MODEL_DIR'] = os.path.join(root, 'artifacts')
+        os.environ['UPLOAD_DIR'] = os.path.join(root, 'uploads')
+        os.environ['DATA_MARKER_PATH'] = os.path.join(root, 'artifacts', 'CURRENT')
+        # The app starts without data; each size is loaded explicitly below
+        with contextlib.redirect_stdout(io.StringIO()):
+            app_module = importlib.import_module('app')
+        client = app_module.app.test_client()
+
+        for size in sizes:
+            print(f"Benchmarking {size} students...", file=sys.stderr)
+            result = run_size(app_module, client, root, size, args)
+            results.append(result)
+            timings = result['timings']
+            print(f"  train {timings['train_seconds']:.2f}s  load {timings['load_seconds']:.2f}s  "
+                  f"student p50 {timings['student_request']['p50'] * 1000:.1f}ms  "
+                  f"class p50 {timings['class_request']['p50'] * 1000:.1f}ms  "
+                  f"upload {timings['upload_total_seconds']:.2f}s", file=sys.stderr)
+
+        config = app_module.config
+        settings = {name: getattr(config, name) for name in
+                    ('STORAGE_FORMAT', 'TRAIN_N_JOBS', 'INCREMENTAL_MAX_FRACTION', 'ANALYSIS_WORKERS', 'CONFIDENCE_METHOD')}
+
+    report = {
+        'commit': commit,
+        'dirty': dirty,
+        'started_at': started.isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+        },
+        'settings': settings,
+        'parameters': vars(args),
+        'results': results,
+    }
+
+    output = args.output
+    if output is None:
+        name = f"{started.strftime('%Y%m%dT%H%M%S')}-{(commit or 'unknown')[:10]}{'-dirty' if dirty else ''}.json"
+        output = os.path.join('benchmarks', 'results', name)
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Synthetic student rosters with the same schema as data/detailed_student_data.csv"""
+import numpy as np
+import pandas as pd
+
+SUBJECTS = ['english', 'maths', 'science', 'social', 'computer']
+
+
+def roster_columns(subjects=SUBJECTS):
+    """Column order used by detailed_student_data.csv"""
+    columns = ['student_id', 'student_name', 'class']
+    for test in ('pat', 'sat'):
+        for term in ('t1', 't2'):
+            columns.extend(f'{test}_{subject}_{term}' for subject in subjects)
+    columns.append('attendance_percentage')
+    return columns
+
+
+def generate_roster(n_students, n_classes=4, seed=42, subjects=SUBJECTS):
+    """
+    Generate a roster of n_students spread evenly over n_classes classes.
+    Scores are drawn around a per-student ability so subjects stay correlated like real data.
+    """
+    rng = np.random.default_rng(seed)
+    ability = rng.normal(72, 12, size=n_students)
+    attendance = np.clip(ability * 0.4 + rng.normal(55, 6, size=n_students), 50, 100).round()
+
+    data = {
+        'student_id': [f'STU{i:07d}' for i in range(1, n_students + 1)],
+        'student_name': [f'Student {i}' for i in range(1, n_students + 1)],
+        'class': [f'{10 + (i % n_classes) // 26}{chr(65 + (i % n_classes) % 26)}' for i in range(n_students)],
+    }
+    for subject in subjects:
+        aptitude = ability + rng.normal(0, 6, size=n_students)
+        trend = rng.normal(0, 3, size=n_students)
+        for test in ('pat', 'sat'):
+            for term, shift in (('t1', 0), ('t2', 1)):
+                scores = aptitude + shift * trend + rng.normal(0, 4, size=n_students)
+                data[f'{test}_{subject}_{term}'] = np.clip(scores, 0, 100).round().astype(int)
+    data['attendance_percentage'] = attendance.astype(int)
+
+    return pd.DataFrame(data)[roster_columns(subjects)]
+
+
+def write_roster(path, n_students, n_classes=4, seed=42):
+    """Generate a roster and write it as CSV, returning the DataFrame"""
+    df = generate_roster(n_students, n_classes=n_classes, seed=seed)
+    df.to_csv(path, index=False)
+    return df
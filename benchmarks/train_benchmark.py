@@ -0,0 +1,73 @@
+"""
+Benchmark StudentPredictor training on synthetic rosters.
+
+Usage: python -m benchmarks.train_benchmark [--sizes 1000,10000,100000,1000000] [--jobs 1,4,32]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import write_roster
+from models.predictor import StudentPredictor
+
+
+def legacy_features(df, subject):
+    """The row-at-a-time feature construction train() used before it was vectorized"""
+    X = []
+    y = []
+    for _, row in df.iterrows():
+        X.append([
+            float(row[f'pat_{subject}_t1']),
+            float(row[f'sat_{subject}_t1']),
+            float(row[f'pat_{subject}_t2']),
+            float(row[f'sat_{subject}_t2']),
+            float(row['attendance_percentage'])
+        ])
+        y.append(np.mean(X[-1][:4]))
+    return np.array(X), np.array(y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000',
+                        help='comma separated roster sizes')
+    parser.add_argument('--legacy-max', type=int, default=100000,
+                        help='largest size to also time the old iterrows path on')
+    parser.add_argument('--jobs', default='1',
+                        help='comma separated training worker counts to compare')
+    args = parser.parse_args()
+    job_counts = [int(j) for j in args.jobs.split(',')]
+
+    predictor = StudentPredictor()
+    print(f"{'rows':>10} {'iterrows feats':>15} {'vector feats':>13} {'jobs':>5} {'train total':>12}  per subject")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(s) for s in args.sizes.split(',')]:
+            path = os.path.join(tmp, f'roster_{size}.csv')
+            df = write_roster(path, size)
+
+            legacy = '-'
+            if size <= args.legacy_max:
+                start = time.perf_counter()
+                for subject in predictor.subjects:
+                    legacy_features(df, subject)
+                legacy = f'{time.perf_counter() - start:.3f}s'
+
+            start = time.perf_counter()
+            predictor._build_features(df)
+            vectorized = time.perf_counter() - start
+
+            for jobs in job_counts:
+                predictor = StudentPredictor(n_jobs=jobs)
+                start = time.perf_counter()
+                predictor.train(path)
+                total = time.perf_counter() - start
+
+                per_subject = ' '.join(f'{s}={t:.2f}' for s, t in predictor.training_report['subject_seconds'].items())
+                print(f'{size:>10} {legacy:>15} {vectorized:>12.3f}s {jobs:>5} {total:>11.3f}s  {per_subject}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import os
+
+# Student roster used at startup and replaced by uploads
+DATA_PATH = os.environ.get('STUDENT_DATA_PATH', 'data/detailed_student_data.csv')
+
+# Directory holding trained predictor artifacts, keyed by a fingerprint of the training data
+MODEL_DIR = os.environ.get('MODEL_DIR', 'artifacts')
+
+# Uploaded rosters are staged here until their models are trained and published
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', 'data/uploads')
+
+# On-disk format for the roster: 'feather' (memory-mapped Arrow IPC), 'parquet' or 'csv'.
+# DATA_PATH stays the CSV source; columnar formats keep a converted copy next to it.
+STORAGE_FORMAT = os.environ.get('STORAGE_FORMAT', 'feather')
+
+# Appended uploads whose new or changed rows are at most this fraction of the roster update the
+# existing models incrementally instead of retraining them; 0 disables incremental updates
+INCREMENTAL_MAX_FRACTION = float(os.environ.get('INCREMENTAL_MAX_FRACTION', '0.2'))
+
+# Incremental updates add trees; once a subject's forest would exceed this, it is retrained from scratch
+MAX_ESTIMATORS = int(os.environ.get('MAX_ESTIMATORS', '300'))
+
+# Workers used to train the subject models: 1 trains serially, -1 uses every core.
+# Subjects train in parallel processes and any remaining workers build trees within each forest.
+TRAIN_N_JOBS = int(os.environ.get('TRAIN_N_JOBS', '1'))
+
+# Analyzer calls run on a bounded thread pool; requests beyond workers + pending get a 503
+ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', '4'))
+ANALYSIS_MAX_PENDING = int(os.environ.get('ANALYSIS_MAX_PENDING', '32'))
+
+# Written after an upload is published so other server processes reload the new data and models
+DATA_MARKER_PATH = os.environ.get('DATA_MARKER_PATH', os.path.join(MODEL_DIR, 'CURRENT'))
+# How often each process checks the marker, in seconds
+RELOAD_CHECK_SECONDS = float(os.environ.get('RELOAD_CHECK_SECONDS', '5'))
+# Upload job status files, shared by all server processes so any of them can answer a status poll
+JOB_STATE_DIR = os.environ.get('JOB_STATE_DIR', os.path.join(os.path.dirname(DATA_MARKER_PATH) or '.', 'jobs'))
+
+# How prediction confidence is estimated: 'tree_std' (spread of the forest's tree predictions),
+# or 'quantile' (10th-90th percentile range of the tree predictions)
+CONFIDENCE_METHOD = os.environ.get('CONFIDENCE_METHOD', 'tree_std')
+
+# Allow a single request to be profiled by adding ?profile=1; the response is then the sampled stacks
+PROFILING_ENABLED = os.environ.get('ENABLE_PROFILING', '0') == '1'
+# Seconds between stack samples while a profiled request runs
+PROFILE_INTERVAL_SECONDS = float(os.environ.get('PROFILE_INTERVAL_SECONDS', '0.005'))
+
+# POST /predict: concurrent requests arriving within the wait window are scored together,
+# up to PREDICT_BATCH_MAX records per model pass; requests beyond PREDICT_MAX_PENDING queued records get a 503
+PREDICT_BATCH_MAX = int(os.environ.get('PREDICT_BATCH_MAX', '256'))
+PREDICT_BATCH_WAIT_SECONDS = float(os.environ.get('PREDICT_BATCH_WAIT_SECONDS', '0.002'))
+PREDICT_MAX_PENDING = int(os.environ.get('PREDICT_MAX_PENDING', '4096'))
+# Most records a single /predict request may carry
+PREDICT_MAX_RECORDS = int(os.environ.get('PREDICT_MAX_RECORDS', '1000'))
+
+# GET /students and /classes: default and largest page sizes
+LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', '50'))
+LIST_MAX_PAGE_SIZE = int(os.environ.get('LIST_MAX_PAGE_SIZE', '500'))
@@ -0,0 +1,21 @@
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+
+# Load data and models once in the master, then fork workers that share them copy-on-write
+preload_app = True
+
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, multiprocessing.cpu_count() // 2)))
+# Threaded workers keep serving cheap requests (cached analyses, static files) while
+# CPU-bound analyzer calls wait on the bounded analysis pool in app.py
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', '8'))
+
+# Retraining after an upload runs in the background, but large class batches can still take a while
+timeout = int(os.environ.get('TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
@@ -1,98 +1,298 @@
 import pandas as pd
 import numpy as np
+import copy
+import ctypes
+import hashlib
+import os
+from datetime import datetime, timezone
+from threading import Lock
+import config
+from .cache import LRUCache
+from .features import BANDS, RISK_LEVELS, build_feature_table, performance_bands
+from .metrics import stage, timed
+from .storage import RosterStore
 from .predictor import StudentPredictor
 
+try:
+    _libc = ctypes.CDLL('libc.so.6')
+except OSError:
+    _libc = None
+
+
+def release_free_memory():
+    """Return heap pages freed by parsing and training to the OS, so workers do not keep them resident (glibc only)"""
+    if _libc is not None:
+        _libc.malloc_trim(0)
+
+class DataSnapshot:
+    """
+    One loaded roster together with its derived features, lookup indexes and the models trained on it.
+    StudentAnalyzer replaces whole snapshots, so a reader holding one never sees half-updated state.
+    """
+
+    def __init__(self, version, data, predictor, features=None, subjects=None, fingerprint=None):
+        self.version = version
+        self.data = data
+        self.predictor = predictor
+        # HTTP cache validators from the fingerprints of the published data and of the saved models, so every
+        # server process serving the same roster with the same models derives the same ETag and Last-Modified
+        if fingerprint is None and data is not None:
+            fingerprint = predictor.fingerprint(data)
+        self.fingerprint = fingerprint
+        if predictor.artifact_fingerprint:
+            model = predictor.artifact_fingerprint
+        else:
+            # Unsaved models: only this process knows them
+            model = f'{os.getpid()}-{version}-{id(predictor)}'
+        self.etag = hashlib.sha256(f'{fingerprint}:{model}'.encode()).hexdigest()[:16]
+        if fingerprint is not None and predictor.artifact_fingerprint == fingerprint:
+            # Saved for exactly this data, so the artifact is rewritten whenever the data changes
+            self.last_modified = datetime.fromtimestamp(predictor.artifact_mtime, timezone.utc)
+        else:
+            self.last_modified = datetime.now(timezone.utc)
+        # student_id -> row position and class -> row positions
+        if data is None:
+            self.features = None
+            self.student_index = pd.Index([])
+            self.class_index = {}
+        else:
+            # Term averages, trends, flags and attendance risk for every student, row-aligned with data
+            if features is None:
+                features = build_feature_table(data, subjects or predictor.subjects)
+            self.features = features
+            self.student_index = pd.Index(data['student_id'])
+            # Populate the index lookup structures now instead of on the first request
+            if len(self.student_index):
+                self.student_index.get_loc(self.student_index[0])
+            self.class_index = data.groupby('class', sort=False, observed=True).indices
+
+    def position(self, student_id):
+        """Row position of a student using the student_id index"""
+        try:
+            position = self.student_index.get_loc(student_id)
+        except KeyError:
+            raise ValueError(f"Student {student_id} not found")
+        if not isinstance(position, (int, np.integer)):
+            # Duplicate ids: keep the first row like the original boolean lookup did
+            position = np.flatnonzero(self.student_index == student_id)[0]
+        return position
+
+    def class_positions(self, class_id):
+        """Row positions of a class using the class index"""
+        return self.class_index.get(class_id, np.array([], dtype=np.intp))
+
+    def get_student(self, student_id):
+        """Return the data row for a student"""
+        return self.data.iloc[self.position(student_id)]
+
+    def get_class(self, class_id):
+        """Return the data rows for a class"""
+        return self.data.iloc[self.class_positions(class_id)]
+
+
 class StudentAnalyzer:
     def __init__(self):
-        self.data = None
         self.subjects = ['english', 'maths', 'science', 'social', 'computer']
-        self.predictor = StudentPredictor()
+        # Current data, indexes and models; replaced atomically by publish()
+        self._snapshot = DataSnapshot(0, None, StudentPredictor())
+        self._publish_lock = Lock()
+        self._analysis_cache = LRUCache(maxsize=1024)
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def data(self):
+        return self._snapshot.data
 
-    def load_data(self, data_path='data/detailed_student_data.csv'):
+    @property
+    def predictor(self):
+        return self._snapshot.predictor
+
+    @property
+    def analysis_cache(self):
+        return self._analysis_cache
+
+    @property
+    def data_version(self):
+        """Bumped on every publish so cached results never outlive the data they came from"""
+        return self._snapshot.version
+
+    @timed('analyzer.load_data')
+    def load_data(self, data_path=config.DATA_PATH, model_dir=config.MODEL_DIR, progress=None):
+        """
+        Load a roster and its models, then publish them as the new snapshot.
+        Requests keep being served from the previous snapshot until this finishes.
+        """
         try:
-            self.data = pd.read_csv(data_path)
-            # Train the predictor with the loaded data
-            self.predictor.train(data_path)
+            data = RosterStore(data_path, config.STORAGE_FORMAT, self.subjects).read()
+            self.load_frame(data, model_dir, progress=progress)
             return True
         except Exception as e:
             print(f"Error loading data: {str(e)}")
             return False
 
+    @timed('analyzer.load_frame')
+    def load_frame(self, data, model_dir=config.MODEL_DIR, progress=None, features=None):
+        """Load or train models for an already-parsed roster and publish both"""
+        predictor = StudentPredictor()
+        fingerprint = predictor.fingerprint(data)
+        # Load saved models for this data, training them only if the data changed
+        if not predictor.load_or_train(model_dir=model_dir, progress=progress, data=data, fingerprint=fingerprint):
+            raise ValueError("Model training failed")
+        return self.publish(data, predictor, features, fingerprint)
+
+    @timed('analyzer.update_frame')
+    def update_frame(self, data, delta, model_dir=config.MODEL_DIR, progress=None, features=None):
+        """
+        Publish a roster whose models are the current ones updated with only the delta rows.
+        Falls back to load_frame when the predictor asks for a full retrain.
+        """
+        predictor = self._snapshot.predictor
+        if len(delta):
+            # Update a copy so the published snapshot's models are never modified in place
+            predictor = copy.deepcopy(predictor)
+            if not predictor.update(delta, max_estimators=config.MAX_ESTIMATORS, progress=progress):
+                return self.load_frame(data, model_dir, progress=progress, features=features)
+        else:
+            # Only names or classes changed, or rows were resent: same models, but the data and its
+            # fingerprint are new. Save them under it too, or other processes reloading this data retrain.
+            predictor = copy.copy(predictor)
+        fingerprint = predictor.fingerprint(data)
+        try:
+            if fingerprint != predictor.artifact_fingerprint:
+                predictor.save(predictor.artifact_path(model_dir, fingerprint), fingerprint)
+                predictor.prune_artifacts(model_dir)
+        except Exception as e:
+            print(f"Error saving model artifact: {str(e)}")
+        return self.publish(data, predictor, features, fingerprint)
+
+    @timed('analyzer.publish')
+    def publish(self, data, predictor, features=None, fingerprint=None):
+        """
+        Atomically replace the current data and models with a new versioned snapshot
+        features: derived feature table for data, built here when not supplied
+        fingerprint: StudentPredictor.fingerprint(data), computed here when not supplied
+        """
+        with self._publish_lock:
+            snapshot = DataSnapshot(self._snapshot.version + 1, data, predictor, features, self.subjects, fingerprint)
+            self._snapshot = snapshot
+            self._analysis_cache.clear()
+        release_free_memory()
+        return snapshot
+
     def get_class_list(self):
         """Get the list of unique classes from the data"""
         try:
-            if self.data is None:
+            data = self._snapshot.data
+            if data is None:
                 raise ValueError("No data loaded")
-            return sorted(self.data['class'].unique())
+            return sorted(data['class'].unique())
         except Exception as e:
             print(f"Error getting class list: {str(e)}")
             return []
 
-    def predict_final_marks(self, student_id):
+    def _trends(self, features):
+        """Per-subject trend labels from rows of the derived feature table"""
+        return {
+            subject: features[f'{subject}_trend'].to_numpy(dtype=object)
+            for subject in self.subjects
+        }
+
+    @timed('analyzer.predict_final_marks')
+    def predict_final_marks(self, student_id, snapshot=None):
         try:
-            student = self.data[self.data['student_id'] == student_id].iloc[0]
-            
-            # Prepare student data for prediction
-            student_data = {
-                'attendance_percentage': float(student['attendance_percentage'])
-            }
-            
-            # Add test scores for each subject
-            for subject in self.subjects:
-                student_data[f'pat_{subject}_t1'] = float(student[f'pat_{subject}_t1'])
-                student_data[f'sat_{subject}_t1'] = float(student[f'sat_{subject}_t1'])
-                student_data[f'pat_{subject}_t2'] = float(student[f'pat_{subject}_t2'])
-                student_data[f'sat_{subject}_t2'] = float(student[f'sat_{subject}_t2'])
-            
-            # Get ML predictions
-            return self.predictor.predict(student_data)
+            snapshot = snapshot or self._snapshot
+            position = snapshot.position(student_id)
+
+            # Get ML predictions, reusing the precomputed trends
+            rows = [position]
+            return snapshot.predictor.predict_batch(
+                snapshot.data.iloc[rows], self._trends(snapshot.features.iloc[rows])
+            )[0]
 
         except Exception as e:
             raise Exception(f"Error predicting final marks: {str(e)}")
 
-    def predict_future_attendance(self, student_id):
+    @timed('analyzer.predict_final_marks_batch')
+    def predict_final_marks_batch(self, student_ids=None, class_id=None, snapshot=None):
+        """Predict final marks for a list of students or a whole class in one pass"""
         try:
-            student = self.data[self.data['student_id'] == student_id].iloc[0]
-            current_attendance = float(student['attendance_percentage'])
-            
-            # Calculate performance trends
-            subject_trends = []
-            for subject in self.subjects:
-                term1_avg = (float(student[f'pat_{subject}_t1']) + 
-                           float(student[f'sat_{subject}_t1'])) / 2
-                term2_avg = (float(student[f'pat_{subject}_t2']) + 
-                           float(student[f'sat_{subject}_t2'])) / 2
-                subject_trends.append(term2_avg - term1_avg)
-            
-            # Average performance trend
-            avg_trend = sum(subject_trends) / len(subject_trends)
-            
-            # Predict attendance
-            attendance_change = avg_trend * 0.15  # Performance trend affects attendance
-            predicted_attendance = max(70, min(100, current_attendance + attendance_change))
-            
-            # Determine risk level
-            risk_level = 'low'
-            if predicted_attendance < 75:
-                risk_level = 'high'
-            elif predicted_attendance < 85:
-                risk_level = 'medium'
-            
+            snapshot = snapshot or self._snapshot
+            if class_id is not None:
+                positions = snapshot.class_positions(class_id)
+                if student_ids is not None:
+                    wanted = snapshot.data['student_id'].to_numpy()[positions]
+                    positions = positions[pd.Series(wanted).isin(student_ids).to_numpy()]
+            elif student_ids is not None:
+                positions = snapshot.student_index.get_indexer(pd.unique(pd.Series(student_ids, dtype=object)))
+                positions = np.sort(positions[positions >= 0])
+            else:
+                positions = np.arange(len(snapshot.data))
+
+            students = snapshot.data.iloc[positions]
+            predictions = snapshot.predictor.predict_batch(students, self._trends(snapshot.features.iloc[positions]))
+            return dict(zip(students['student_id'], predictions))
+
+        except Exception as e:
+            raise Exception(f"Error predicting final marks: {str(e)}")
+
+    @timed('analyzer.predict_records')
+    def predict_records(self, records):
+        """
+        Score raw records that are not part of the roster (what-if inputs) in one pass over the models
+        records: normalized score/attendance dicts from validate_records
+        Returns per record the subject predictions, the overall performance level and recommendations
+        """
+        predictor = self._snapshot.predictor
+        predictions = predictor.predict_batch(pd.DataFrame.from_records(records))
+        # Average predicted score over the subjects that could be scored
+        totals = np.zeros(len(predictions))
+        counts = np.zeros(len(predictions))
+        for i, student_predictions in enumerate(predictions):
+            for subject_prediction in student_predictions.values():
+                if subject_prediction is not None:
+                    totals[i] += subject_prediction['predicted_score']
+                    counts[i] += 1
+        bands = performance_bands(np.divide(totals, counts, out=np.zeros(len(totals)), where=counts > 0))
+        return [
+            {
+                'predictions': student_predictions,
+                'performance_level': BANDS[band],
+                'recommendations': predictor.get_recommendations(student_predictions)
+            }
+            for student_predictions, band in zip(predictions, bands)
+        ]
+
+    @timed('analyzer.predict_future_attendance')
+    def predict_future_attendance(self, student_id, snapshot=None):
+        try:
+            snapshot = snapshot or self._snapshot
+            position = snapshot.position(student_id)
+            derived = snapshot.features.iloc[position]
+
+            # Forecast and risk level are precomputed in the derived feature table
             return {
-                'current_attendance': current_attendance,
-                'predicted_attendance': round(predicted_attendance, 1),
-                'risk_level': risk_level,
-                'performance_correlation': round(abs(avg_trend), 2),
-                'trend': 'improving' if avg_trend > 0 else 'declining' if avg_trend < 0 else 'stable'
+                'current_attendance': float(snapshot.data['attendance_percentage'].iat[position]),
+                'predicted_attendance': round(float(derived['predicted_attendance']), 1),
+                'risk_level': derived['attendance_risk'],
+                'performance_correlation': round(abs(float(derived['avg_trend'])), 2),
+                'trend': derived['trend']
             }
 
         except Exception as e:
             raise Exception(f"Error predicting attendance: {str(e)}")
 
-    def get_student_performance(self, student_id):
+    @timed('analyzer.get_student_performance')
+    def get_student_performance(self, student_id, snapshot=None):
         try:
+            snapshot = snapshot or self._snapshot
             # Get basic performance data
-            student = self.data[self.data['student_id'] == student_id].iloc[0]
+            with stage('analyzer.lookup'):
+                position = snapshot.position(student_id)
+                student = snapshot.data.iloc[position]
+                derived = snapshot.features.iloc[position]
             
             performance = {
                 'name': student['student_name'],
@@ -101,32 +301,23 @@ class StudentAnalyzer:
                 'subjects': {}
             }
 
-            # Calculate subject performances
+            # Subject performances: raw scores plus precomputed averages
             for subject in self.subjects:
-                # Get individual test scores
-                pat_t1 = float(student[f'pat_{subject}_t1'])
-                pat_t2 = float(student[f'pat_{subject}_t2'])
-                sat_t1 = float(student[f'sat_{subject}_t1'])
-                sat_t2 = float(student[f'sat_{subject}_t2'])
-
-                term1_avg = (pat_t1 + sat_t1) / 2
-                term2_avg = (pat_t2 + sat_t2) / 2
-                
                 performance['subjects'][subject] = {
-                    'pat_t1': pat_t1,
-                    'sat_t1': sat_t1,
-                    'pat_t2': pat_t2,
-                    'sat_t2': sat_t2,
-                    'term1_average': round(term1_avg, 2),
-                    'term2_average': round(term2_avg, 2),
-                    'average_score': round((term1_avg + term2_avg) / 2, 2),
-                    'improvement': round(term2_avg - term1_avg, 2)
+                    'pat_t1': float(student[f'pat_{subject}_t1']),
+                    'sat_t1': float(student[f'sat_{subject}_t1']),
+                    'pat_t2': float(student[f'pat_{subject}_t2']),
+                    'sat_t2': float(student[f'sat_{subject}_t2']),
+                    'term1_average': round(float(derived[f'{subject}_term1_avg']), 2),
+                    'term2_average': round(float(derived[f'{subject}_term2_avg']), 2),
+                    'average_score': round(float(derived[f'{subject}_avg']), 2),
+                    'improvement': round(float(derived[f'{subject}_improvement']), 2)
                 }
 
             # Add predictions
             performance['predictions'] = {
-                'final_marks': self.predict_final_marks(student_id),
-                'attendance': self.predict_future_attendance(student_id)
+                'final_marks': self.predict_final_marks(student_id, snapshot),
+                'attendance': self.predict_future_attendance(student_id, snapshot)
             }
             
             return performance
@@ -134,79 +325,199 @@ class StudentAnalyzer:
         except Exception as e:
             raise Exception(f"Error getting student performance: {str(e)}")
 
-    def get_class_insights(self, class_id):
-        """Get insights for a specific class"""
-        try:
-            class_data = self.data[self.data['class'] == class_id]
-            
-            insights = {
-                'total_students': len(class_data),
-                'average_attendance': class_data['attendance_percentage'].mean(),
-                'subject_performance': {},
+    def _summarize_classes(self, frame, features):
+        """Build insights for every class present in frame with one groupby pass over its derived features"""
+        subject_avgs = features[[f'{subject}_avg' for subject in self.subjects]].to_numpy(dtype=np.float64)
+
+        summary = pd.DataFrame(subject_avgs, columns=self.subjects)
+        summary['class'] = frame['class'].to_numpy()
+        summary['attendance'] = frame['attendance_percentage'].to_numpy()
+        summary['band'] = features['performance_band'].to_numpy()
+
+        grouped = summary.groupby('class', sort=False)
+        means = grouped[self.subjects + ['attendance']].mean()
+        sizes = grouped.size()
+        bands = grouped['band'].value_counts().unstack(fill_value=0)
+
+        # Students averaging below 60 in a subject, grouped by class in roster order
+        names = frame['student_name'].to_numpy()
+        weak_students = {}
+        for i, subject in enumerate(self.subjects):
+            mask = features[f'{subject}_weak'].to_numpy()
+            weak = pd.DataFrame({
+                'class': summary['class'].to_numpy()[mask],
+                'name': names[mask],
+                'score': subject_avgs[mask, i].round(2)
+            })
+            weak_students[subject] = {
+                class_id: rows[['name', 'score']].to_dict('records')
+                for class_id, rows in weak.groupby('class', sort=False)
+            }
+
+        insights = {}
+        for class_id in sizes.index:
+            insights[class_id] = {
+                'total_students': int(sizes[class_id]),
+                'average_attendance': float(means.at[class_id, 'attendance']),
+                'subject_performance': {
+                    subject: {
+                        'average_score': round(float(means.at[class_id, subject]), 2),
+                        'weak_students': weak_students[subject].get(class_id, [])
+                    }
+                    for subject in self.subjects
+                },
                 'performance_distribution': {
-                    'excellent': 0,
-                    'good': 0,
-                    'average': 0,
-                    'needs_improvement': 0
+                    band: int(bands.at[class_id, band]) if band in bands.columns else 0
+                    for band in ('excellent', 'good', 'average', 'needs_improvement')
                 }
             }
+        return insights
 
-            # Calculate subject-wise performance
-            for subject in self.subjects:
-                subject_cols = [col for col in class_data.columns if subject in col.lower()]
-                weak_students = []
-                
-                for _, student in class_data.iterrows():
-                    subject_scores = [student[col] for col in subject_cols]
-                    avg_score = sum(subject_scores) / len(subject_scores)
-                    
-                    if avg_score < 60:
-                        weak_students.append({
-                            'name': student['student_name'],
-                            'score': round(avg_score, 2)
-                        })
-                
-                # Calculate average score for all students in the subject
-                all_scores = []
-                for _, student in class_data.iterrows():
-                    subject_scores = [float(student[col]) for col in subject_cols]
-                    all_scores.append(sum(subject_scores) / len(subject_scores))
-                
-                avg_score = sum(all_scores) / len(all_scores) if all_scores else 0
-                
-                insights['subject_performance'][subject] = {
-                    'average_score': round(float(avg_score), 2),
-                    'weak_students': weak_students
+    @timed('analyzer.get_class_insights')
+    def get_class_insights(self, class_id, snapshot=None):
+        """Get insights for a specific class, cached per data version"""
+        try:
+            snapshot = snapshot or self._snapshot
+            key = ('class', class_id, snapshot.version)
+            insights = self._analysis_cache.get(key)
+            if insights is not None:
+                return insights
+
+            positions = snapshot.class_positions(class_id)
+            if len(positions) == 0:
+                return {
+                    'total_students': 0,
+                    'average_attendance': float('nan'),
+                    'subject_performance': {
+                        subject: {'average_score': 0, 'weak_students': []}
+                        for subject in self.subjects
+                    },
+                    'performance_distribution': {
+                        'excellent': 0,
+                        'good': 0,
+                        'average': 0,
+                        'needs_improvement': 0
+                    }
                 }
+            insights = self._summarize_classes(snapshot.data.iloc[positions], snapshot.features.iloc[positions])[class_id]
+            self._analysis_cache.put(key, insights)
+            return insights
 
-            # Calculate performance distribution
-            for _, student in class_data.iterrows():
-                avg_scores = []
-                for subject in self.subjects:
-                    subject_cols = [col for col in student.index if subject in col.lower()]
-                    subject_avg = student[subject_cols].mean()
-                    avg_scores.append(subject_avg)
-                
-                overall_avg = np.mean(avg_scores)
-                
-                if overall_avg >= 85:
-                    insights['performance_distribution']['excellent'] += 1
-                elif overall_avg >= 70:
-                    insights['performance_distribution']['good'] += 1
-                elif overall_avg >= 60:
-                    insights['performance_distribution']['average'] += 1
-                else:
-                    insights['performance_distribution']['needs_improvement'] += 1
+        except Exception as e:
+            raise Exception(f"Error getting class insights: {str(e)}")
 
+    @timed('analyzer.get_all_class_insights')
+    def get_all_class_insights(self, snapshot=None):
+        """Get insights for every class in one pass over the data, cached per data version"""
+        try:
+            snapshot = snapshot or self._snapshot
+            if snapshot.data is None:
+                raise ValueError("No data loaded")
+            key = ('all_classes', snapshot.version)
+            insights = self._analysis_cache.get(key)
+            if insights is None:
+                insights = self._summarize_classes(snapshot.data, snapshot.features)
+                insights = {class_id: insights[class_id] for class_id in sorted(insights)}
+                self._analysis_cache.put(key, insights)
             return insights
 
         except Exception as e:
             raise Exception(f"Error getting class insights: {str(e)}")
 
-    def identify_weak_subjects(self, student_id):
+    @timed('analyzer.list_students')
+    def list_students(self, class_id=None, risk=None, after=-1, limit=50, snapshot=None):
+        """
+        One page of students in roster order, optionally only one class and/or attendance risk level
+        after: row position of the last student on the previous page
+        Returns the page and the position to continue after, or None on the last page
+        """
+        snapshot = snapshot or self._snapshot
+        if snapshot.data is None:
+            return [], None
+        if risk is not None and risk not in RISK_LEVELS:
+            raise ValueError(f"risk must be one of {', '.join(RISK_LEVELS)}")
+
+        if class_id is None and risk is None:
+            # Unfiltered pages are plain position ranges
+            positions = np.arange(after + 1, min(after + 2 + limit, len(snapshot.data)))
+        else:
+            if class_id is not None:
+                positions = snapshot.class_positions(class_id)
+                positions = positions[np.searchsorted(positions, after, side='right'):]
+            else:
+                positions = np.arange(after + 1, len(snapshot.data))
+            if risk is not None:
+                codes = snapshot.features['attendance_risk'].cat.codes.to_numpy()
+                positions = positions[codes[positions] == RISK_LEVELS.index(risk)]
+            positions = positions[:limit + 1]
+
+        page = positions[:limit]
+        rows = snapshot.data.iloc[page]
+        derived = snapshot.features.iloc[page]
+        students = [
+            {'student_id': student_id, 'student_name': name, 'class': class_name, 'risk_level': risk_level,
+             'performance_band': band}
+            for student_id, name, class_name, risk_level, band in zip(
+                rows['student_id'], rows['student_name'], rows['class'],
+                derived['attendance_risk'], derived['performance_band']
+            )
+        ]
+        next_after = int(page[-1]) if len(positions) > limit else None
+        return students, next_after
+
+    @timed('analyzer.list_classes')
+    def list_classes(self, after=-1, limit=50, snapshot=None):
+        """
+        One page of classes in name order with their size, average attendance and high-risk student count
+        after: index into the sorted class list of the last class on the previous page
+        Returns the page and the index to continue after, or None on the last page
+        """
+        snapshot = snapshot or self._snapshot
+        if snapshot.data is None:
+            return [], None
+        names = sorted(snapshot.class_index)
+        attendance = snapshot.data['attendance_percentage'].to_numpy()
+        high_risk = snapshot.features['attendance_risk'].cat.codes.to_numpy() == RISK_LEVELS.index('high')
+
+        classes = []
+        for class_id in names[after + 1:after + 1 + limit]:
+            positions = snapshot.class_positions(class_id)
+            classes.append({
+                'class': class_id,
+                'total_students': int(len(positions)),
+                'average_attendance': round(float(attendance[positions].mean()), 2),
+                'high_risk_students': int(high_risk[positions].sum())
+            })
+        next_after = after + limit if after + 1 + limit < len(names) else None
+        return classes, next_after
+
+    @timed('analyzer.analyze_student')
+    def analyze_student(self, student_id, snapshot=None):
+        """
+        Full analysis for a student: performance, weak/strong subjects and recommendations.
+        Performance is computed once and shared; results are cached per data version.
+        """
+        snapshot = snapshot or self._snapshot
+        key = ('student', student_id, snapshot.version)
+        result = self._analysis_cache.get(key)
+        if result is not None:
+            return result
+
+        performance = self.get_student_performance(student_id, snapshot)
+        result = {
+            'performance': performance,
+            'analysis': self.identify_weak_subjects(student_id, performance),
+            'suggestions': self.get_recommendations(student_id, performance)
+        }
+        self._analysis_cache.put(key, result)
+        return result
+
+    @timed('analyzer.identify_weak_subjects')
+    def identify_weak_subjects(self, student_id, performance=None):
         """Identify weak and strong subjects for a student"""
         try:
-            performance = self.get_student_performance(student_id)
+            if performance is None:
+                performance = self.get_student_performance(student_id)
             weak_subjects = []
             strong_subjects = []
 
@@ -232,11 +543,12 @@ class StudentAnalyzer:
         except Exception as e:
             raise Exception(f"Error identifying weak subjects: {str(e)}")
 
-    def get_recommendations(self, student_id):
+    @timed('analyzer.get_recommendations')
+    def get_recommendations(self, student_id, performance=None):
         """Generate personalized recommendations for a student"""
         try:
-            analysis = self.identify_weak_subjects(student_id)
-            performance = self.get_student_performance(student_id)
+            if performance is None:
+                performance = self.get_student_performance(student_id)
             predictions = performance['predictions']
             
             # Get ML-based recommendations
@@ -0,0 +1,76 @@
+import queue
+import time
+from concurrent.futures import Future
+from threading import Lock, Thread
+
+from .executor import ServerBusy
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls into small batches.
+    Requests arriving within max_wait of the first one in a batch, up to max_batch items, are
+    handled by a single fn(items) call on one worker thread, so per-call model overhead is paid
+    once per batch instead of once per request. fn takes a list and returns a list of results in
+    the same order. At most max_pending items may be queued; beyond that callers get ServerBusy.
+    """
+
+    def __init__(self, fn, max_batch=256, max_wait=0.002, max_pending=4096):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._lock = Lock()
+        # Started on first use, so a batcher created before gunicorn forks still gets a thread in each worker
+        self._worker = None
+
+    def submit(self, items, timeout=None):
+        """Queue items for the next batch and wait for their results"""
+        items = list(items)
+        if not items:
+            return []
+        with self._lock:
+            if self._pending + len(items) > self.max_pending:
+                raise ServerBusy("Server is busy, please retry")
+            self._pending += len(items)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._worker.start()
+        future = Future()
+        self._queue.put((items, future))
+        return future.result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request[0])
+            self._process(batch)
+
+    def _process(self, batch):
+        items = [item for request_items, _ in batch for item in request_items]
+        try:
+            results = self.fn(items)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+        else:
+            start = 0
+            for request_items, future in batch:
+                future.set_result(results[start:start + len(request_items)])
+                start += len(request_items)
+        finally:
+            with self._lock:
+                self._pending -= len(items)
@@ -0,0 +1,77 @@
+import numpy as np
+
+# Uncertainty estimates StudentPredictor can turn into a confidence score
+METHODS = ('tree_std', 'quantile')
+
+# Width of the 10th-90th percentile range of a normal distribution, in standard deviations
+_QUANTILE_RANGE_IN_STD = 2.5631
+
+
+class PackedForest:
+    """
+    A fitted forest's trees packed into (n_trees, max_nodes) arrays.
+    All per-tree predictions for a batch come from walking every tree at once, one depth level
+    per step, instead of calling tree.predict on each estimator. Past WALK_MAX_ROWS the walk's
+    gathers cost more than the compiled per-tree predict, so large batches use that instead.
+    """
+
+    WALK_MAX_ROWS = 1000
+
+    def __init__(self, model):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        n_trees = len(trees)
+        max_nodes = max(tree.node_count for tree in trees)
+
+        # Node ids are flattened to tree * max_nodes + node; leaves point back at themselves, so
+        # samples that reach a leaf early simply stay put for the remaining levels
+        offsets = np.arange(n_trees) * max_nodes
+        flat = np.arange(n_trees * max_nodes).reshape(n_trees, max_nodes)
+        self.left = flat.copy()
+        self.right = flat.copy()
+        self.feature = np.zeros((n_trees, max_nodes), dtype=np.intp)
+        self.threshold = np.zeros((n_trees, max_nodes))
+        self.value = np.zeros((n_trees, max_nodes))
+        for i, tree in enumerate(trees):
+            count = tree.node_count
+            split = tree.children_left != -1
+            self.left[i, :count][split] = tree.children_left[split] + offsets[i]
+            self.right[i, :count][split] = tree.children_right[split] + offsets[i]
+            self.feature[i, :count] = np.maximum(tree.feature, 0)
+            self.threshold[i, :count] = tree.threshold
+            self.value[i, :count] = tree.value[:, 0, 0]
+        self.left, self.right = self.left.ravel(), self.right.ravel()
+        self.feature, self.threshold, self.value = self.feature.ravel(), self.threshold.ravel(), self.value.ravel()
+        self.depth = max(tree.max_depth for tree in trees)
+        self._roots = offsets
+        self._estimators = model.estimators_
+
+    def tree_predictions(self, X):
+        """Per-tree predictions, shape (n_samples, n_trees)"""
+        # Trees compare float32 features against float64 thresholds; do the same so splits match exactly
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) > self.WALK_MAX_ROWS:
+            predictions = np.empty((len(X), len(self._estimators)))
+            for i, estimator in enumerate(self._estimators):
+                predictions[:, i] = estimator.tree_.predict(X)[:, 0]
+            return predictions
+        n_features = X.shape[1]
+        X = X.ravel()
+        rows = (np.arange(len(X) // n_features) * n_features)[:, np.newaxis]
+        nodes = np.broadcast_to(self._roots, (len(rows), len(self._roots))).copy()
+        for _ in range(self.depth):
+            goes_left = X.take(rows + self.feature.take(nodes)) <= self.threshold.take(nodes)
+            nodes = np.where(goes_left, self.left.take(nodes), self.right.take(nodes))
+        return self.value.take(nodes)
+
+
+def tree_spread(tree_predictions, method='tree_std'):
+    """Spread of the per-tree predictions for each sample, expressed as a standard deviation"""
+    if method == 'quantile':
+        low, high = np.percentile(tree_predictions, [10, 90], axis=1)
+        return (high - low) / _QUANTILE_RANGE_IN_STD
+    return tree_predictions.std(axis=1)
+
+
+def confidence_from_spread(spread):
+    """Map prediction spread to the 60-95 confidence scale used across the app"""
+    return np.clip(100 - spread * 5, 60, 95)
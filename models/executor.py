@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+
+
+class ServerBusy(Exception):
+    """Raised when too many analysis calls are already running or queued"""
+
+
+class BoundedExecutor:
+    """
+    Runs CPU-bound analyzer calls on a fixed pool of threads.
+    At most max_workers calls run at once and at most max_pending more wait; beyond that
+    callers get ServerBusy right away instead of piling up behind the pandas/sklearn work.
+    """
+
+    def __init__(self, max_workers=4, max_pending=32):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._slots = BoundedSemaphore(max_workers + max_pending)
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        """Run fn on the pool and wait for its result"""
+        if not self._slots.acquire(blocking=False):
+            raise ServerBusy("Server is busy, please retry")
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=timeout)
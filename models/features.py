@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from .ingest import SUBJECTS, concat_columns
+
+TRENDS = ['declining', 'stable', 'improving']
+RISK_LEVELS = ['low', 'medium', 'high']
+BANDS = ['needs_improvement', 'average', 'good', 'excellent']
+
+
+def _trend(delta):
+    """'improving' / 'declining' / 'stable' for each sign of delta, as a categorical"""
+    codes = (np.sign(delta) + 1).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=TRENDS)
+
+
+def performance_bands(overall):
+    """Codes into BANDS for overall averages: excellent from 85, good from 70, average from 60"""
+    return np.select([overall >= 85, overall >= 70, overall >= 60], [3, 2, 1], default=0).astype(np.int8)
+
+
+def build_feature_table(data, subjects=SUBJECTS):
+    """
+    Derived per-student features in one vectorized pass, row-aligned with data:
+    per-subject term averages, overall average, improvement and trend, weak/strong flags,
+    performance band and the attendance forecast with its risk level.
+    """
+    n = len(data)
+    columns = {}
+    improvements = np.empty((n, len(subjects)))
+    averages = np.empty((n, len(subjects)))
+
+    for i, subject in enumerate(subjects):
+        pat_t1 = data[f'pat_{subject}_t1'].to_numpy(dtype=np.float64)
+        sat_t1 = data[f'sat_{subject}_t1'].to_numpy(dtype=np.float64)
+        pat_t2 = data[f'pat_{subject}_t2'].to_numpy(dtype=np.float64)
+        sat_t2 = data[f'sat_{subject}_t2'].to_numpy(dtype=np.float64)
+
+        term1 = (pat_t1 + sat_t1) / 2
+        term2 = (pat_t2 + sat_t2) / 2
+        averages[:, i] = (term1 + term2) / 2
+        improvements[:, i] = term2 - term1
+
+        # Halves and quarters of 0-100 scores are exact in float32, at half the memory
+        columns[f'{subject}_term1_avg'] = term1.astype(np.float32)
+        columns[f'{subject}_term2_avg'] = term2.astype(np.float32)
+        columns[f'{subject}_avg'] = averages[:, i].astype(np.float32)
+        columns[f'{subject}_improvement'] = improvements[:, i].astype(np.float32)
+        columns[f'{subject}_trend'] = _trend(improvements[:, i])
+        columns[f'{subject}_weak'] = averages[:, i] < 60
+        columns[f'{subject}_strong'] = averages[:, i] >= 85
+
+    overall = averages.mean(axis=1) if n else np.empty(0)
+    columns['overall_avg'] = overall
+    columns['performance_band'] = pd.Categorical.from_codes(performance_bands(overall), categories=BANDS)
+
+    # Attendance forecast: the average performance trend nudges attendance, bounded to 70-100
+    avg_trend = improvements.mean(axis=1) if n else np.empty(0)
+    attendance = data['attendance_percentage'].to_numpy(dtype=np.float64)
+    predicted = np.clip(attendance + avg_trend * 0.15, 70, 100)
+    columns['avg_trend'] = avg_trend
+    columns['trend'] = _trend(avg_trend)
+    columns['predicted_attendance'] = predicted
+    columns['attendance_risk'] = pd.Categorical.from_codes(
+        np.select([predicted < 75, predicted < 85], [2, 1], default=0).astype(np.int8),
+        categories=RISK_LEVELS
+    )
+
+    return pd.DataFrame(columns, index=data.index)
+
+
+def merge_feature_tables(existing, existing_features, new, new_features):
+    """Feature table matching merge_rosters(existing, new), reusing rows that were not uploaded again"""
+    if existing is None or len(existing) == 0:
+        return new_features.reset_index(drop=True)
+    kept = ~existing['student_id'].isin(new['student_id']).to_numpy()
+    return concat_columns((col, [existing_features[col][kept], new_features[col]]) for col in existing_features.columns)
@@ -0,0 +1,192 @@
+import os
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow  # noqa: F401
+    NAME_DTYPE = 'string[pyarrow]'
+except ImportError:
+    NAME_DTYPE = 'object'
+
+SUBJECTS = ['english', 'maths', 'science', 'social', 'computer']
+ID_COLUMNS = ['student_id', 'student_name', 'class']
+
+
+def score_columns(subjects=SUBJECTS):
+    """PAT/SAT score columns for every subject and term"""
+    return [
+        f'{test}_{subject}_{term}'
+        for subject in subjects
+        for test in ('pat', 'sat')
+        for term in ('t1', 't2')
+    ]
+
+
+def required_columns(subjects=SUBJECTS):
+    return ID_COLUMNS + score_columns(subjects) + ['attendance_percentage']
+
+
+def roster_dtypes(subjects=SUBJECTS):
+    """
+    Explicit parse dtypes for the roster; names are Arrow-backed strings.
+    Scores are parsed as int64 so out-of-range values can be rejected before compact_roster narrows them
+    to uint8: narrower parse types wrap silently (300 becomes 44 in uint8, 65636 becomes 100 in int16),
+    while int64 overflow is an error. Only one chunk is ever held at this width.
+    Attendance stays float64 so reported percentages are exactly what was uploaded.
+    class is parsed as object and made categorical by compact_roster chunk by chunk.
+    """
+    dtypes = {col: 'object' for col in ID_COLUMNS}
+    dtypes['student_name'] = NAME_DTYPE
+    dtypes.update({col: 'int64' for col in score_columns(subjects)})
+    dtypes['attendance_percentage'] = 'float64'
+    return dtypes
+
+
+def _has_dtype(column, dtype):
+    if dtype == 'category':
+        return isinstance(column.dtype, pd.CategoricalDtype)
+    return column.dtype == pd.api.types.pandas_dtype(dtype)
+
+
+def compact_roster(data):
+    """
+    Convert a roster to its in-memory dtypes: categorical class, Arrow-backed names and uint8 scores.
+    student_id stays object: the lookup index shares those strings, where Arrow ids would be copied into it.
+    Columns that already have their dtype are left alone, so compacting a compact roster copies nothing.
+    """
+    dtypes = {'student_id': 'object', 'student_name': NAME_DTYPE, 'class': 'category',
+              'attendance_percentage': 'float64'}
+    dtypes.update({col: 'uint8' for col in data.columns if col.startswith(('pat_', 'sat_'))})
+    changed = {
+        col: dtype for col, dtype in dtypes.items()
+        if col in data.columns and not _has_dtype(data[col], dtype)
+    }
+    if not changed:
+        return data
+    return data.astype(changed, copy=False)
+
+
+def concat_columns(columns):
+    """
+    Build a frame from (name, pieces) pairs one column at a time, so apart from the pieces themselves only
+    one full-length column is being assembled at once. columns may be a generator that slices its pieces
+    lazily. Categorical pieces with different categories are unioned (sorted) instead of falling back to object.
+    """
+    frame = {}
+    for name, pieces in columns:
+        if isinstance(pieces[0].dtype, pd.CategoricalDtype) and any(p.dtype != pieces[0].dtype for p in pieces):
+            frame[name] = pd.Series(union_categoricals(pieces, sort_categories=True), name=name)
+        else:
+            frame[name] = pd.concat(pieces, ignore_index=True)
+        del pieces
+    return pd.DataFrame(frame, copy=False)
+
+
+def validate_records(records, subjects=SUBJECTS):
+    """
+    Validate raw score/attendance records for ad-hoc scoring and return them normalized.
+    Each record needs attendance_percentage and the PAT/SAT scores for both terms of every subject,
+    all numbers from 0 to 100; pat_score and sat_score fill in any PAT or SAT score left out.
+    Other fields (names, ids) are ignored. Raises ValueError naming the first invalid record.
+    """
+    columns = score_columns(subjects) + ['attendance_percentage']
+    normalized = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Record {i}: expected an object of scores")
+        for key in record:
+            if key.startswith(('pat_', 'sat_')) and key not in columns and key not in ('pat_score', 'sat_score'):
+                raise ValueError(f"Record {i}: unknown score field {key}; subjects are {', '.join(subjects)}")
+
+        row = {}
+        for column in columns:
+            value = record.get(column)
+            if value is None and column != 'attendance_percentage':
+                value = record.get(f'{column[:3]}_score')
+            if value is None:
+                raise ValueError(f"Record {i}: missing {column}")
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+                raise ValueError(f"Record {i}: {column} must be a number between 0 and 100")
+            row[column] = float(value)
+        normalized.append(row)
+    return normalized
+
+
+def validate_header(source, subjects=SUBJECTS):
+    """Check that a CSV has every required column without parsing its rows"""
+    columns = pd.read_csv(source, nrows=0).columns
+    missing = [col for col in required_columns(subjects) if col not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+
+def _validate_chunk(chunk, subjects, first_row):
+    scores = chunk[score_columns(subjects)]
+    if ((scores < 0) | (scores > 100)).any().any():
+        raise ValueError(f"Scores must be between 0 and 100 (rows {first_row}-{first_row + len(chunk) - 1})")
+    if chunk[ID_COLUMNS + ['attendance_percentage']].isna().any().any():
+        raise ValueError(f"Missing student details or attendance (rows {first_row}-{first_row + len(chunk) - 1})")
+
+
+def read_roster(source, subjects=SUBJECTS, chunksize=100_000):
+    """
+    Parse a roster CSV in chunks with compact dtypes, validating each chunk as it arrives.
+    Each chunk is converted to its final dtypes before the next is parsed, and the frame is then
+    assembled column by column, so peak memory is about the compact frame plus one chunk and one column.
+    source can be a path or an open file.
+    """
+    validate_header(source, subjects)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    pieces = {}
+    first_row = 1
+    try:
+        for chunk in pd.read_csv(source, dtype=roster_dtypes(subjects), chunksize=chunksize):
+            _validate_chunk(chunk, subjects, first_row)
+            for col, values in compact_roster(chunk).items():
+                pieces.setdefault(col, []).append(values)
+            first_row += len(chunk)
+            del chunk
+    except (TypeError, ValueError, OverflowError) as e:
+        raise ValueError(f"Invalid roster data near row {first_row}: {str(e)}")
+
+    if not pieces:
+        return compact_roster(pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in roster_dtypes(subjects).items()}))
+    return concat_columns((col, pieces.pop(col)) for col in list(pieces))
+
+
+def merge_rosters(existing, new):
+    """Append new students to a roster, replacing rows for students that already exist"""
+    if existing is None or len(existing) == 0:
+        return compact_roster(new.reset_index(drop=True))
+    kept = ~existing['student_id'].isin(new['student_id']).to_numpy()
+    if list(existing.columns) != list(new.columns):
+        # Differing extra columns: let concat align them and fill the gaps
+        return compact_roster(pd.concat([existing[kept], new], ignore_index=True))
+    # The kept rows are sliced one column at a time rather than copying the whole previous roster first
+    return concat_columns((col, [existing[col][kept], new[col]]) for col in existing.columns)
+
+
+def changed_rows(existing, new, subjects=SUBJECTS):
+    """Rows of new whose student is not in existing or whose scores or attendance differ"""
+    if existing is None or len(existing) == 0:
+        return new
+    columns = score_columns(subjects) + ['attendance_percentage']
+    previous = existing.drop_duplicates('student_id', keep='last').set_index('student_id')[columns]
+    incoming = new.set_index('student_id')[columns]
+
+    known = incoming.index.isin(previous.index)
+    unchanged = np.zeros(len(new), dtype=bool)
+    unchanged[known] = (
+        previous.loc[incoming.index[known]].to_numpy() == incoming[known].to_numpy()
+    ).all(axis=1)
+    return new[~unchanged]
+
+
+def write_roster(data, path):
+    """Write a roster CSV atomically so readers never see a partial file"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    data.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,111 @@
+import glob
+import json
+import os
+import re
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+JOB_ID = re.compile(r'[0-9a-f]{12}')
+
+
+class TrainingJobs:
+    """
+    Runs retraining jobs one at a time on a background worker thread and tracks their status.
+    Jobs are called with a `progress` keyword argument they can use to report a 0-1 fraction.
+    With state_dir, every status change is also written there as one JSON file per job, so any
+    server process sharing the directory can report on a job another process is running.
+    """
+
+    def __init__(self, max_history=50, state_dir=None):
+        self.max_history = max_history
+        self.state_dir = state_dir
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='retrain')
+        self._jobs = OrderedDict()
+        self._lock = Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, progress=..., **kwargs) and return the job id"""
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': 'queued',
+                'progress': 0.0,
+                'result': None,
+                'error': None,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None
+            }
+            while len(self._jobs) > self.max_history:
+                self._jobs.popitem(last=False)
+            self._store(self._jobs[job_id])
+        self._prune_stored()
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def status(self, job_id):
+        """Return a copy of the job's status, or None if it is unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        # Submitted by another process
+        if self.state_dir is None or not JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _path(self, job_id):
+        return os.path.join(self.state_dir, f'{job_id}.json')
+
+    def _store(self, job):
+        """Write a job's status atomically so readers in other processes never see a partial file"""
+        if self.state_dir is None:
+            return
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            path = self._path(job['id'])
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(job, f, default=str)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error saving status of job {job['id']}: {str(e)}")
+
+    def _prune_stored(self):
+        """Keep only the newest max_history status files across all processes"""
+        if self.state_dir is None:
+            return
+        try:
+            stored = sorted(glob.glob(os.path.join(self.state_dir, '*.json')), key=os.path.getmtime)
+        except OSError:
+            # Another process removed a file while listing; it is pruning already
+            return
+        for stale in stored[:-self.max_history]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+                self._store(self._jobs[job_id])
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status='running', started_at=time.time())
+        try:
+            result = fn(*args, progress=lambda fraction: self._update(job_id, progress=round(fraction, 3)), **kwargs)
+            self._update(job_id, status='done', progress=1.0, result=result, finished_at=time.time())
+        except Exception as e:
+            print(f"Error in training job {job_id}: {str(e)}\n{traceback.format_exc()}")
+            self._update(job_id, status='failed', error=str(e), finished_at=time.time())
@@ -0,0 +1,193 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+# Histogram bucket upper bounds in seconds, from sub-millisecond lookups up to full retrains
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values, cheap enough to observe on every call"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labelvalues, (counts, total) in sorted(series.items()):
+            labels = list(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = _format_labels(labels + [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds the histograms observed on the hot paths, plus collectors that read gauges and counters
+    from live objects (caches, the current snapshot) only when /metrics is scraped.
+    """
+
+    def __init__(self):
+        self._histograms = []
+        self._collectors = []
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        histogram = Histogram(name, help_text, labelnames, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def register_collector(self, collector):
+        """collector() returns (name, type, help, [(labels dict, value), ...]) tuples"""
+        self._collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for histogram in self._histograms:
+            lines.extend(histogram.collect())
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'student_analytics_stage_seconds',
+    'Time spent in each analyzer, predictor and serialization stage',
+    ['stage']
+)
+
+REQUEST_SECONDS = registry.histogram(
+    'student_analytics_request_seconds',
+    'HTTP request latency by endpoint',
+    ['endpoint', 'method', 'status']
+)
+
+
+@contextmanager
+def stage(name):
+    """Time a block of code as one stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, name)
+
+
+def timed(name):
+    """Decorator timing every call of a function as one stage"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, name)
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of selected threads on a background thread while a request runs.
+    Threads are added with follow(), so work handed to the analysis pool is sampled too.
+    Results are folded stacks ("frame;frame;frame count"), the input format of flame graph tools.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._threads = {threading.get_ident()}
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def start(self):
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        return self
+
+    def follow(self, fn):
+        """Wrap fn so the thread that ends up running it is sampled while it does"""
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            ident = threading.get_ident()
+            self._threads.add(ident)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._threads.discard(ident)
+        return wrapper
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self._threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.samples[self._fold(frame)] += 1
+
+    @staticmethod
+    def _fold(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def folded(self):
+        """Collapsed stacks, most sampled first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
@@ -1,128 +1,366 @@
+import glob
+import hashlib
+import os
+import time
 import pandas as pd
 import numpy as np
+import joblib
+from joblib import Parallel, delayed, effective_n_jobs
+import sklearn
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
+import config
+from .confidence import METHODS, PackedForest, confidence_from_spread, tree_spread
+from .metrics import stage, timed
+from .storage import RosterStore
+
+def _fit_subject(X, y, n_jobs):
+    """Fit one subject's scaler and forest; module level so worker processes can run it"""
+    start = time.perf_counter()
+
+    # Create and fit scaler
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    # Create and train model
+    model = RandomForestRegressor(
+        n_estimators=100,
+        max_depth=5,
+        random_state=42,
+        n_jobs=n_jobs
+    )
+    model.fit(X_scaled, y)
+    # Predictions are small batches where thread start-up costs more than it saves
+    model.set_params(n_jobs=None)
+    return scaler, model, time.perf_counter() - start
+
 
 class StudentPredictor:
-    def __init__(self):
+    def __init__(self, n_jobs=config.TRAIN_N_JOBS, confidence_method=config.CONFIDENCE_METHOD):
         self.models = {}  # One model per subject
         self.scalers = {}  # One scaler per subject
+        self.rows_seen = {}  # Rows each subject's forest has been fitted on, including updates
+        self._packed = {}  # PackedForest per subject, built on first prediction
+        self._importances = {}  # Rounded feature importance percentages per subject
+        if confidence_method not in METHODS:
+            raise ValueError(f"Unknown confidence method: {confidence_method}")
+        self.confidence_method = confidence_method
         self.subjects = ['english', 'maths', 'science', 'social', 'computer']
         self.is_trained = False
+        # Training workers: subjects train in parallel processes, the rest go to trees within each forest
+        self.n_jobs = n_jobs
+        self.training_report = None
+        # Fingerprint and modification time of the saved artifact holding exactly these models, if any
+        self.artifact_fingerprint = None
+        self.artifact_mtime = None
+
+    @staticmethod
+    def _score_columns(subject):
+        """PAT/SAT columns used as features for a subject, in feature order"""
+        return [f'pat_{subject}_t1', f'sat_{subject}_t1', f'pat_{subject}_t2', f'sat_{subject}_t2']
 
-    def train(self, data_path='data/detailed_student_data.csv'):
+    def _build_features(self, df, subjects=None):
+        """
+        Build the feature matrices and targets for every subject at once
+        Returns two dicts keyed by subject: X of shape (n_students, 5) and y of shape (n_students,)
+        """
+        subjects = subjects or self.subjects
+        score_cols = [col for subject in subjects for col in self._score_columns(subject)]
+        # (n_students, n_subjects, 4) block of PAT/SAT scores in feature order
+        scores = df[score_cols].to_numpy(dtype=np.float64).reshape(len(df), len(subjects), 4)
+        attendance = df['attendance_percentage'].to_numpy(dtype=np.float64)
+
+        # Target: Average of all scores (current performance)
+        targets = scores.mean(axis=2)
+
+        features = {}
+        labels = {}
+        for i, subject in enumerate(subjects):
+            # Features: Previous scores and attendance
+            features[subject] = np.column_stack([scores[:, i, :], attendance])
+            labels[subject] = targets[:, i]
+        return features, labels
+
+    @timed('predictor.train')
+    def train(self, data_path='data/detailed_student_data.csv', progress=None, data=None):
+        """
+        Fit one scaler and forest per subject
+        data: already-parsed roster; data_path is only read when it is not given
+        progress: optional callable receiving the fraction of subjects trained so far
+        """
         try:
-            df = pd.read_csv(data_path)
-            
-            for subject in self.subjects:
-                # Prepare features for each subject
-                X = []
-                y = []
-                
-                for _, row in df.iterrows():
-                    # Features: Previous scores and attendance
-                    features = [
-                        float(row[f'pat_{subject}_t1']),
-                        float(row[f'sat_{subject}_t1']),
-                        float(row[f'pat_{subject}_t2']),
-                        float(row[f'sat_{subject}_t2']),
-                        float(row['attendance_percentage'])
-                    ]
-                    
-                    # Target: Average of all scores (current performance)
-                    target = np.mean([
-                        float(row[f'pat_{subject}_t1']),
-                        float(row[f'sat_{subject}_t1']),
-                        float(row[f'pat_{subject}_t2']),
-                        float(row[f'sat_{subject}_t2'])
-                    ])
-                    
-                    X.append(features)
-                    y.append(target)
-
-                X = np.array(X)
-                y = np.array(y)
-
-                # Create and fit scaler
-                self.scalers[subject] = StandardScaler()
-                X_scaled = self.scalers[subject].fit_transform(X)
-
-                # Create and train model
-                self.models[subject] = RandomForestRegressor(
-                    n_estimators=100,
-                    max_depth=5,
-                    random_state=42
-                )
-                self.models[subject].fit(X_scaled, y)
-            
+            store = RosterStore(data_path, config.STORAGE_FORMAT, self.subjects)
+            if data is None and store.columnar is None:
+                data = store.read()
+            if data is not None:
+                features, labels = self._build_features(data)
+
+            def subject_tasks():
+                for subject in self.subjects:
+                    if data is None:
+                        # Columnar storage: read only this subject's scores and attendance
+                        columns = self._score_columns(subject) + ['attendance_percentage']
+                        subject_features, subject_labels = self._build_features(store.read(columns), [subject])
+                    else:
+                        subject_features, subject_labels = features, labels
+                    yield delayed(_fit_subject)(subject_features[subject], subject_labels[subject], tree_jobs)
+
+            total_jobs = effective_n_jobs(self.n_jobs)
+            subject_jobs = min(total_jobs, len(self.subjects))
+            tree_jobs = max(1, total_jobs // subject_jobs)
+
+            start = time.perf_counter()
+            timings = {}
+            results = Parallel(n_jobs=subject_jobs, return_as='generator')(subject_tasks())
+            self._packed = {}
+            self._importances = {}
+            self.artifact_fingerprint = self.artifact_mtime = None
+            for done, (subject, (scaler, model, seconds)) in enumerate(zip(self.subjects, results), start=1):
+                self.scalers[subject] = scaler
+                self.models[subject] = model
+                self.rows_seen[subject] = int(scaler.n_samples_seen_)
+                timings[subject] = round(seconds, 3)
+
+                if progress is not None:
+                    progress(done / len(self.subjects))
+
+            self.training_report = {
+                'n_jobs': total_jobs,
+                'subject_workers': subject_jobs,
+                'tree_workers': tree_jobs,
+                'subject_seconds': timings,
+                'total_seconds': round(time.perf_counter() - start, 3)
+            }
             self.is_trained = True
             return True
         except Exception as e:
             print(f"Error training model: {str(e)}")
             return False
 
+    @timed('predictor.update')
+    def update(self, delta, max_estimators=300, progress=None):
+        """
+        Incrementally update trained models with new or changed rows only.
+        The scalers are kept as fitted, so the existing trees' predictions do not move, and new trees
+        are warm-started on the delta, in proportion to its share of all rows seen so far.
+        Returns False when a full retrain is needed instead (untrained, or the forest would exceed max_estimators).
+        """
+        if not self.is_trained:
+            return False
+        if len(delta) == 0:
+            return True
+
+        try:
+            self.artifact_fingerprint = self.artifact_mtime = None
+            features, labels = self._build_features(delta)
+            for subject in self.subjects:
+                model = self.models[subject]
+                added = int(np.ceil(100 * len(delta) / self.rows_seen[subject]))
+                if len(model.estimators_) + added > max_estimators:
+                    return False
+
+            for done, subject in enumerate(self.subjects, start=1):
+                X = features[subject]
+                y = labels[subject]
+                scaler = self.scalers[subject]
+                model = self.models[subject]
+                added = int(np.ceil(100 * len(delta) / self.rows_seen[subject]))
+
+                # Trees do not depend on feature scale, so the scaler is not refitted: moving it would
+                # mean rewriting every split threshold, and forest thresholds often sit within one
+                # float32 step of a training value, where the rewritten split can land on the other side.
+                model.set_params(warm_start=True, n_estimators=len(model.estimators_) + added)
+                model.fit(scaler.transform(X), y)
+                model.set_params(warm_start=False)
+                self.rows_seen[subject] += len(delta)
+                # The packed trees and importances must be rebuilt
+                self._packed.pop(subject, None)
+                self._importances.pop(subject, None)
+
+                if progress is not None:
+                    progress(done / len(self.subjects))
+
+            return True
+        except Exception as e:
+            print(f"Error updating model: {str(e)}")
+            self.is_trained = False
+            return False
+
+    @staticmethod
+    def fingerprint(data):
+        """SHA-256 of the training roster's contents, used to key saved model artifacts"""
+        digest = hashlib.sha256()
+        digest.update(repr(list(zip(data.columns, data.dtypes.astype(str)))).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def artifact_path(self, model_dir, fingerprint):
+        """Location of the saved models for a given data fingerprint"""
+        return os.path.join(model_dir, f'predictor-{fingerprint[:16]}.joblib')
+
+    @staticmethod
+    def prune_artifacts(model_dir, keep=3):
+        """Delete all but the newest `keep` saved artifacts in model_dir; call after every save()"""
+        artifacts = sorted(glob.glob(os.path.join(model_dir, 'predictor-*.joblib')), key=os.path.getmtime)
+        for stale in artifacts[:-keep]:
+            os.remove(stale)
+
+    @timed('predictor.save')
+    def save(self, path, fingerprint=None):
+        """Serialize the trained scalers and models to path"""
+        if not self.is_trained:
+            raise ValueError("Cannot save an untrained predictor")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        state = {
+            'fingerprint': fingerprint,
+            'sklearn_version': sklearn.__version__,
+            'subjects': self.subjects,
+            'scalers': self.scalers,
+            'models': self.models,
+            'rows_seen': self.rows_seen
+        }
+        # Write to a temporary file first so readers never see a partial artifact
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, path)
+        self.artifact_fingerprint = fingerprint
+        self.artifact_mtime = os.path.getmtime(path)
+
+    @timed('predictor.load')
+    def load(self, path, fingerprint=None):
+        """Load scalers and models saved by save(), memory-mapping their arrays"""
+        try:
+            state = joblib.load(path, mmap_mode='r')
+            if state['sklearn_version'] != sklearn.__version__ or state['subjects'] != self.subjects:
+                return False
+            if fingerprint is not None and state['fingerprint'] != fingerprint:
+                return False
+            self.scalers = state['scalers']
+            self.models = state['models']
+            self.rows_seen = state.get('rows_seen') or {
+                subject: int(scaler.n_samples_seen_) for subject, scaler in self.scalers.items()}
+            self._packed = {}
+            self._importances = {}
+            self.artifact_fingerprint = state['fingerprint']
+            self.artifact_mtime = os.path.getmtime(path)
+            self.is_trained = True
+            return True
+        except Exception as e:
+            print(f"Error loading model artifact: {str(e)}")
+            return False
+
+    def load_or_train(self, data_path='data/detailed_student_data.csv', model_dir='artifacts', keep=3,
+                      progress=None, data=None, fingerprint=None):
+        """
+        Load models trained on this exact data if an artifact exists, otherwise train and save them
+        data: already-parsed roster; data_path is only read when it is not given
+        fingerprint: fingerprint(data) when the caller already has it
+        Only the newest `keep` artifacts are kept in model_dir
+        """
+        if data is None:
+            data = RosterStore(data_path, config.STORAGE_FORMAT, self.subjects).read()
+        if fingerprint is None:
+            fingerprint = self.fingerprint(data)
+        path = self.artifact_path(model_dir, fingerprint)
+        if os.path.exists(path) and self.load(path, fingerprint):
+            return True
+
+        if not self.train(progress=progress, data=data):
+            return False
+        try:
+            self.save(path, fingerprint)
+            self.prune_artifacts(model_dir, keep)
+        except Exception as e:
+            print(f"Error saving model artifact: {str(e)}")
+        return True
+
+    def _packed_forest(self, subject):
+        packed = self._packed.get(subject)
+        if packed is None:
+            packed = self._packed[subject] = PackedForest(self.models[subject])
+        return packed
+
+    def _importance_pct(self, subject):
+        # feature_importances_ averages over every tree on each access, so keep the rounded result
+        importance_pct = self._importances.get(subject)
+        if importance_pct is None:
+            importances = self.models[subject].feature_importances_
+            importance_pct = self._importances[subject] = [round(i * 100, 1) for i in importances]
+        return importance_pct
+
     def predict(self, student_data):
         """
         Predict performance for a student
         student_data: Dictionary with subject scores and attendance
         """
+        return self.predict_batch(pd.DataFrame([student_data]))[0]
+
+    @timed('predictor.predict_batch')
+    def predict_batch(self, df, trends=None):
+        """
+        Predict performance for many students at once
+        df: DataFrame with one row per student holding subject scores and attendance
+        trends: optional precomputed trend labels per subject; derived from the scores when missing
+        Returns a list of per-student prediction dicts in the same order as df
+        """
+        if len(df) == 0:
+            return []
         if not self.is_trained:
             self.train()
-        
-        predictions = {}
-        
+
+        features, _ = self._build_features(df)
+        factors = ['PAT T1', 'SAT T1', 'PAT T2', 'SAT T2', 'Attendance']
+        predictions = [{} for _ in range(len(df))]
+
         for subject in self.subjects:
             try:
-                # Prepare features
-                features = [
-                    student_data[f'pat_{subject}_t1'],
-                    student_data[f'sat_{subject}_t1'],
-                    student_data[f'pat_{subject}_t2'],
-                    student_data[f'sat_{subject}_t2'],
-                    student_data['attendance_percentage']
-                ]
-                
+                X = features[subject]
+
                 # Scale features
-                X_scaled = self.scalers[subject].transform([features])
-                
-                # Get base prediction
-                predicted_score = self.models[subject].predict(X_scaled)[0]
-                
-                # Get prediction confidence using tree variance
-                tree_predictions = []
-                for tree in self.models[subject].estimators_:
-                    tree_predictions.append(tree.predict(X_scaled)[0])
-                
-                variance = np.std(tree_predictions)
-                confidence = min(95, max(60, 100 - (variance * 5)))
-                
+                X_scaled = self.scalers[subject].transform(X)
+
+                with stage('predictor.forest'):
+                    # Per-tree predictions for the whole batch in one vectorized walk, shape (n_students, n_trees)
+                    tree_predictions = self._packed_forest(subject).tree_predictions(X_scaled)
+
+                    # Base prediction is the forest average
+                    predicted_scores = tree_predictions.mean(axis=1)
+
+                    # Get prediction confidence from the spread of the tree predictions
+                    confidences = confidence_from_spread(tree_spread(tree_predictions, self.confidence_method))
+
                 # Get feature importances
-                importances = self.models[subject].feature_importances_
-                factors = ['PAT T1', 'SAT T1', 'PAT T2', 'SAT T2', 'Attendance']
-                contributing_factors = [
-                    {'factor': f, 'importance': round(i * 100, 1)}
-                    for f, i in zip(factors, importances)
-                ]
-                
+                importance_pct = self._importance_pct(subject)
+
                 # Calculate trend
-                recent_avg = np.mean([features[2], features[3]])  # T2 scores
-                previous_avg = np.mean([features[0], features[1]])  # T1 scores
-                trend = 'improving' if recent_avg > previous_avg else 'declining' if recent_avg < previous_avg else 'stable'
-                
-                predictions[subject] = {
-                    'predicted_score': round(predicted_score, 1),
-                    'confidence': round(confidence, 1),
-                    'trend': trend,
-                    'contributing_factors': contributing_factors
-                }
-                
+                if trends is not None and subject in trends:
+                    subject_trends = trends[subject]
+                else:
+                    recent_avg = X[:, 2:4].mean(axis=1)  # T2 scores
+                    previous_avg = X[:, 0:2].mean(axis=1)  # T1 scores
+                    subject_trends = np.where(recent_avg > previous_avg, 'improving',
+                                              np.where(recent_avg < previous_avg, 'declining', 'stable'))
+
+                for i, student_predictions in enumerate(predictions):
+                    student_predictions[subject] = {
+                        'predicted_score': round(float(predicted_scores[i]), 1),
+                        'confidence': round(float(confidences[i]), 1),
+                        'trend': str(subject_trends[i]),
+                        'contributing_factors': [
+                            {'factor': f, 'importance': imp}
+                            for f, imp in zip(factors, importance_pct)
+                        ]
+                    }
+
             except Exception as e:
                 print(f"Error predicting for {subject}: {str(e)}")
-                predictions[subject] = None
-        
+                for student_predictions in predictions:
+                    student_predictions[subject] = None
+
         return predictions
 
+    @timed('predictor.get_recommendations')
     def get_recommendations(self, performance_data):
         """Generate personalized recommendations based on ML predictions"""
         recommendations = []
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from .ingest import SUBJECTS, compact_roster, read_roster, write_roster
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = feather = pq = None
+
+# Schema metadata key under which a columnar copy records where its rows came from
+PROVENANCE_KEY = b'student_analytics.provenance'
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _with_provenance(data, provenance):
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    if provenance is None:
+        return table
+    metadata = dict(table.schema.metadata or {})
+    metadata[PROVENANCE_KEY] = json.dumps(provenance).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def _read_provenance(schema):
+    raw = (schema.metadata or {}).get(PROVENANCE_KEY)
+    return json.loads(raw) if raw else {}
+
+
+class CsvStore:
+    """Roster kept as CSV text"""
+    extension = '.csv'
+
+    def __init__(self, path, subjects=SUBJECTS):
+        self.path = path
+        self.subjects = subjects
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def read(self, columns=None):
+        data = read_roster(self.path, self.subjects)
+        return data[columns] if columns is not None else data
+
+    def write(self, data, provenance=None):
+        write_roster(data, self.path)
+
+    def provenance(self):
+        """What the stored rows came from; plain CSV files carry none"""
+        return {}
+
+
+class FeatherStore(CsvStore):
+    """Roster kept as uncompressed Arrow IPC (Feather v2) so it can be memory-mapped and read column by column"""
+    extension = '.feather'
+
+    def read(self, columns=None):
+        table = feather.read_table(self.path, columns=columns, memory_map=True)
+        return compact_roster(table.to_pandas())
+
+    def write(self, data, provenance=None):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        feather.write_feather(_with_provenance(data, provenance), tmp_path, compression='uncompressed')
+        os.replace(tmp_path, self.path)
+
+    def provenance(self):
+        if not self.exists():
+            return {}
+        with pa.memory_map(self.path) as source:
+            return _read_provenance(pa.ipc.open_file(source).schema)
+
+
+class ParquetStore(CsvStore):
+    """Roster kept as Parquet; smaller on disk than Feather but decompressed on every read"""
+    extension = '.parquet'
+
+    def read(self, columns=None):
+        return compact_roster(pd.read_parquet(self.path, columns=columns))
+
+    def write(self, data, provenance=None):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        pq.write_table(_with_provenance(data, provenance), tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def provenance(self):
+        if not self.exists():
+            return {}
+        return _read_provenance(pq.read_schema(self.path))
+
+
+STORES = {'csv': CsvStore, 'feather': FeatherStore, 'parquet': ParquetStore}
+
+
+class RosterStore:
+    """
+    The student dataset as seen by the app: a CSV source with a columnar copy next to it.
+    The copy records the SHA-256 of the CSV it was imported from and whether uploads have been
+    written to it. The CSV is re-imported only when its contents change, not merely its mtime, and
+    never over a copy holding uploads: from the first upload on the copy is the dataset.
+    Falls back to plain CSV when pyarrow is missing.
+    """
+
+    def __init__(self, path, storage_format='feather', subjects=SUBJECTS):
+        if storage_format != 'csv' and feather is None:
+            print("pyarrow is not installed, storing the roster as CSV")
+            storage_format = 'csv'
+        if storage_format not in STORES:
+            raise ValueError(f"Unknown storage format: {storage_format}")
+
+        self.source = CsvStore(path, subjects)
+        if storage_format == 'csv':
+            self.columnar = None
+        else:
+            store = STORES[storage_format]
+            self.columnar = store(os.path.splitext(path)[0] + store.extension, subjects)
+
+    def _columnar_is_stale(self):
+        if not self.source.exists():
+            return False
+        if not self.columnar.exists():
+            return True
+        if os.path.getmtime(self.columnar.path) >= os.path.getmtime(self.source.path):
+            return False
+        # The CSV is newer, but a deploy, checkout or touch changes its mtime without changing its rows
+        provenance = self.columnar.provenance()
+        stale = file_sha256(self.source.path) != provenance.get('csv_sha256')
+        if stale and provenance.get('uploaded', True):
+            # Copies without provenance predate it and may hold uploads too
+            print(f"Warning: {self.source.path} changed but {self.columnar.path} holds uploaded data; "
+                  f"keeping the uploaded data. Delete {self.columnar.path} to re-import the CSV.")
+            stale = False
+        if not stale:
+            # Mark the copy current again so the CSV is not hashed on every read
+            os.utime(self.columnar.path)
+        return stale
+
+    def read(self, columns=None):
+        """Read the roster, or only the given columns of it"""
+        if self.columnar is None:
+            return self.source.read(columns)
+        if self._columnar_is_stale():
+            data = self.source.read()
+            self.columnar.write(data, {'csv_sha256': file_sha256(self.source.path), 'uploaded': False})
+            return data[columns] if columns is not None else data
+        return self.columnar.read(columns)
+
+    def write(self, data):
+        """Store an uploaded roster; in the columnar copy it replaces the CSV as the dataset"""
+        if self.columnar is None:
+            self.source.write(data)
+        else:
+            self.columnar.write(data, {**self.columnar.provenance(), 'uploaded': True})
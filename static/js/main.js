@@ -24,7 +24,7 @@ document.getElementById('predictionForm').addEventListener('submit', async (e) =
         const result = await response.json();
 
         if (result.success) {
-            displayResults(result.prediction, result.recommendations);
+            displayResults(result.performance_level, result.recommendations);
         } else {
             alert('Error making prediction: ' + result.error);
         }
@@ -56,7 +56,7 @@ async function uploadData() {
         const result = await response.json();
 
         if (result.success) {
-            alert('Data uploaded successfully!');
+            await waitForTraining(result.status_url);
         } else {
             alert('Error uploading data: ' + result.error);
         }
@@ -66,6 +66,28 @@ async function uploadData() {
     }
 }
 
+// Poll the background retraining job started by an upload
+async function waitForTraining(statusUrl) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const result = await response.json();
+        if (!result.success) {
+            throw new Error(result.error);
+        }
+
+        const job = result.job;
+        if (job.status === 'done') {
+            alert('Data uploaded successfully!');
+            return;
+        }
+        if (job.status === 'failed') {
+            alert('Error processing uploaded data: ' + job.error);
+            return;
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 // Display prediction results
 function displayResults(performance, recommendations) {
     const resultsSection = document.getElementById('results');
@@ -76,8 +98,8 @@ function displayResults(performance, recommendations) {
     resultsSection.style.display = 'block';
 
     // Update performance level
-    performanceLevel.textContent = performance.toUpperCase();
-    performanceLevel.className = 'performance-badge performance-' + performance.toLowerCase();
+    performanceLevel.textContent = performance.replace('_', ' ').toUpperCase();
+    performanceLevel.className = 'performance-badge performance-' + performance.replace('_', '-');
 
     // Update recommendations
     recommendationsList.innerHTML = '';
@@ -0,0 +1,46 @@
+import importlib
+import io
+import os
+import shutil
+import time
+
+import pytest
+
+DATA = os.path.join(os.path.dirname(__file__), os.pardir, 'data', 'detailed_student_data.csv')
+
+
+@pytest.fixture(scope='session')
+def roster_csv():
+    """The sample roster as CSV text"""
+    with open(DATA) as f:
+        return f.read()
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The app, loaded once from a copy of the sample roster with models and uploads in scratch directories"""
+    root = tmp_path_factory.mktemp('app')
+    shutil.copy(DATA, root / 'roster.csv')
+    # config is read when the app is imported, so point it at scratch locations first
+    os.environ['STUDENT_DATA_PATH'] = str(root / 'roster.csv')
+    os.environ['MODEL_DIR'] = str(root / 'artifacts')
+    os.environ['UPLOAD_DIR'] = str(root / 'uploads')
+    os.environ['DATA_MARKER_PATH'] = str(root / 'artifacts' / 'CURRENT')
+    return importlib.import_module('app')
+
+
+@pytest.fixture
+def upload(app_module):
+    """Post a roster CSV to /upload and return its finished job"""
+    client = app_module.app.test_client()
+
+    def upload(csv_text, mode='append'):
+        response = client.post('/upload', data={'file': (io.BytesIO(csv_text.encode()), 'upload.csv'), 'mode': mode})
+        assert response.status_code == 202
+        status_url = response.get_json()['status_url']
+        while True:
+            job = client.get(status_url).get_json()['job']
+            if job['status'] in ('done', 'failed'):
+                return job
+            time.sleep(0.01)
+    return upload
@@ -0,0 +1,60 @@
+import pytest
+
+
+def test_rename_only_upload_invalidates_validators(app_module, upload, roster_csv):
+    client = app_module.app.test_client()
+    first = client.get('/student/STU001')
+    etag = first.headers['ETag']
+    assert client.get('/student/STU001', headers={'If-None-Match': etag}).status_code == 304
+    cursor = client.get('/students?limit=5').get_json()['next_cursor']
+
+    # Same scores and attendance, so the models are reused; only the name and class change
+    renamed = roster_csv.replace('STU001,Aarav Sharma,10A,', 'STU001,Aarav Renamed,10D,')
+    assert renamed != roster_csv
+    assert upload(renamed)['status'] == 'done'
+
+    response = client.get('/student/STU001', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    performance = response.get_json()['performance']
+    assert (performance['name'], performance['class']) == ('Aarav Renamed', '10D')
+    assert client.get(f'/students?limit=5&cursor={cursor}').status_code == 409
+
+    # Another server process loading the stored roster reuses the saved models and agrees on the ETag
+    analyzer = app_module.StudentAnalyzer()
+    assert analyzer.load_data(app_module.config.DATA_PATH, app_module.config.MODEL_DIR)
+    assert analyzer.predictor.training_report is None
+    assert f'"{analyzer.snapshot.etag}"' == response.headers['ETag']
+
+
+def test_validators_follow_data_when_models_are_not_saved(app_module, upload, roster_csv, monkeypatch):
+    from models.predictor import StudentPredictor
+    client = app_module.app.test_client()
+    etag = client.get('/class/10B').headers['ETag']
+
+    def fail_save(self, path, fingerprint=None):
+        raise OSError("read-only model directory")
+    monkeypatch.setattr(StudentPredictor, 'save', fail_save)
+
+    moved = roster_csv.replace('STU006,Ananya Gupta,10B,', 'STU006,Ananya Gupta,10C,')
+    assert upload(moved)['status'] == 'done'
+
+    response = client.get('/class/10B', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['insights']['total_students'] == 4
+
+
+def test_student_cache_entries_do_not_collide_with_class_insights(app_module):
+    analyzer = app_module.analyzer
+    analyzer.get_all_class_insights()
+    # A student ID spelled like another cache key must not be served that entry
+    with pytest.raises(Exception, match='Student all_classes not found'):
+        analyzer.analyze_student('all_classes')
+
+
+@pytest.mark.parametrize('route', ['/students', '/classes'])
+def test_cursor_before_the_first_row_is_rejected(app_module, route):
+    cursor = app_module.encode_cursor(app_module.analyzer.snapshot, -2)
+    response = app_module.app.test_client().get(f'{route}?cursor={cursor}')
+    assert (response.status_code, response.get_json()['error']) == (400, 'Invalid cursor')
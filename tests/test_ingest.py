@@ -0,0 +1,22 @@
+import io
+
+import pytest
+
+from models.ingest import read_roster, score_columns
+
+
+def roster_row(score):
+    header = 'student_id,student_name,class,' + ','.join(score_columns()) + ',attendance_percentage\n'
+    return header + 'STU900,Test Student,10A,' + ','.join(['50'] * 19 + [score]) + ',90\n'
+
+
+@pytest.mark.parametrize('score', ['300', '256', '-200', '612', '65636', '85.5', ''])
+def test_out_of_range_scores_are_rejected(score):
+    with pytest.raises(ValueError):
+        read_roster(io.StringIO(roster_row(score)))
+
+
+def test_scores_are_stored_as_uint8():
+    data = read_roster(io.StringIO(roster_row('100')))
+    assert data[score_columns()].dtypes.eq('uint8').all()
+    assert data[score_columns()[-1]].iloc[0] == 100
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.mark.parametrize('body', [[1], ['STU001'], 'STU001', 7])
+def test_non_object_body_is_rejected(app_module, body):
+    response = app_module.app.test_client().post('/predict/batch', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'request body must be a JSON object'
+
+
+def test_predicts_listed_students(app_module):
+    response = app_module.app.test_client().post('/predict/batch', json={'student_ids': ['STU001', 'NOPE']})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert list(body['predictions']) == ['STU001']
+    assert body['missing'] == ['NOPE']
@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+
+
+def test_update_keeps_original_tree_predictions():
+    from benchmarks.synthetic import generate_roster
+    from models.predictor import StudentPredictor
+    predictor = StudentPredictor(n_jobs=1)
+    assert predictor.train(data=generate_roster(400, seed=1))
+    X, _ = predictor._build_features(generate_roster(200, seed=2))
+    before = {}
+    for subject, model in predictor.models.items():
+        X_scaled = predictor.scalers[subject].transform(X[subject])
+        before[subject] = (len(model.estimators_), [tree.predict(X_scaled) for tree in model.estimators_])
+
+    # A delta with a different score distribution than the rows the forests were fitted on
+    delta = generate_roster(100, seed=3)
+    score_cols = [c for c in delta.columns if c.endswith('_t4')]
+    delta[score_cols] = (delta[score_cols].astype(int) // 2).astype(delta[score_cols].dtypes)
+    assert predictor.update(delta)
+
+    for subject, model in predictor.models.items():
+        count, predictions = before[subject]
+        assert len(model.estimators_) > count
+        X_scaled = predictor.scalers[subject].transform(X[subject])
+        for tree, expected in zip(model.estimators_[:count], predictions):
+            np.testing.assert_allclose(tree.predict(X_scaled), expected, atol=1e-9)
+
+
+def test_prune_artifacts_keeps_newest(tmp_path):
+    from models.predictor import StudentPredictor
+    for i in range(5):
+        path = tmp_path / f'predictor-{i:016d}.joblib'
+        path.write_bytes(b'')
+        os.utime(path, (i, i))
+    StudentPredictor.prune_artifacts(str(tmp_path), keep=3)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f'predictor-{i:016d}.joblib' for i in (2, 3, 4)]
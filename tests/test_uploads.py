@@ -0,0 +1,36 @@
+import io
+
+import pytest
+
+
+@pytest.mark.parametrize('score', ['300', '-200'])
+def test_upload_with_out_of_range_score_fails(app_module, upload, roster_csv, score):
+    before = app_module.analyzer.snapshot
+    header, first, rest = roster_csv.split('\n', 2)
+    bad = first.rsplit(',', 2)[0] + f',{score},' + first.rsplit(',', 1)[1]
+    job = upload('\n'.join([header, bad, rest]))
+    assert job['status'] == 'failed'
+    assert 'between 0 and 100' in job['error']
+    assert app_module.analyzer.snapshot is before
+
+
+def test_upload_merges_into_roster_another_process_published(app_module, upload, roster_csv, monkeypatch):
+    from models.ingest import merge_rosters, read_roster
+    from models.storage import RosterStore
+    config = app_module.config
+    # Keep this process from noticing the other process's marker on its own before the upload runs
+    monkeypatch.setattr(config, 'RELOAD_CHECK_SECONDS', float('inf'))
+    header, first = roster_csv.split('\n', 2)[:2]
+    scores = first.split(',', 3)[3]
+
+    # Another server process stores a new student and bumps the marker; this one has not reloaded yet
+    store = RosterStore(config.DATA_PATH, config.STORAGE_FORMAT, app_module.analyzer.subjects)
+    other = read_roster(io.StringIO(f'{header}\nSTU801,Other Worker,10A,{scores}\n'))
+    store.write(merge_rosters(store.read(), other))
+    with open(config.DATA_MARKER_PATH, 'w') as f:
+        f.write('published by another process')
+    assert 'STU801' not in set(app_module.analyzer.snapshot.data['student_id'])
+
+    assert upload(f'{header}\nSTU802,This Worker,10A,{scores}\n')['status'] == 'done'
+    assert {'STU801', 'STU802'} <= set(app_module.analyzer.snapshot.data['student_id'])
+    assert {'STU801', 'STU802'} <= set(store.read()['student_id'])
@@ -0,0 +1,47 @@
+"""
+Train the subject models offline and save them where the app looks for them.
+
+Usage: python train.py [--data data/detailed_student_data.csv] [--model-dir artifacts] [--jobs N] [--force]
+"""
+import argparse
+import sys
+import time
+
+import config
+from models.storage import RosterStore
+from models.predictor import StudentPredictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=config.DATA_PATH, help='training CSV')
+    parser.add_argument('--model-dir', default=config.MODEL_DIR, help='directory for model artifacts')
+    parser.add_argument('--jobs', type=int, default=config.TRAIN_N_JOBS, help='training workers, -1 for all cores')
+    parser.add_argument('--force', action='store_true', help='retrain even if an artifact for this data exists')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    predictor = StudentPredictor(n_jobs=args.jobs)
+    data = RosterStore(args.data, config.STORAGE_FORMAT, predictor.subjects).read()
+    fingerprint = predictor.fingerprint(data)
+    path = predictor.artifact_path(args.model_dir, fingerprint)
+
+    if args.force:
+        if not predictor.train(data=data):
+            return 1
+        predictor.save(path, fingerprint)
+        predictor.prune_artifacts(args.model_dir)
+    elif not predictor.load_or_train(model_dir=args.model_dir, data=data):
+        return 1
+
+    print(f"Models for {args.data} ({fingerprint[:16]}) ready at {path} in {time.perf_counter() - start:.2f}s")
+    report = predictor.training_report
+    if report is not None:
+        print(f"Trained with {report['subject_workers']} subject x {report['tree_workers']} tree workers:")
+        for subject, seconds in report['subject_seconds'].items():
+            print(f"  {subject:<10} {seconds:.3f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
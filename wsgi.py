@@ -0,0 +1,9 @@
+"""
+Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+Data and models are loaded once when this module is imported. With preload_app the
+gunicorn master imports it before forking, so workers share those pages copy-on-write.
+"""
+from app import app
+
+application = app